@@ -0,0 +1,48 @@
+from hw1cs561s2018 import Chess
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# ______________________________________________________________________________
+# Batch evaluation
+# the utility only depends on how many pieces of each side stand on each row, so a board is encoded as 16 counts,
+# S rows 0 to 7 then C rows 0 to 7, and a batch of boards is valued with one dot product against the row weights
+
+
+class BatchEvaluator:
+    def __init__(self, player, row_values):
+        s_values, c_values = Chess.square_values(player, row_values)
+        self.weights = [s_values[row * 8] for row in range(8)] + [c_values[row * 8] for row in range(8)]
+        if numpy is not None:
+            self.vector = numpy.array(self.weights, dtype=numpy.int64)
+
+    @staticmethod
+    def encode(state):
+        counts = [0] * 16
+        stacks = state.stacks
+        for sq in state.s_squares:
+            counts[sq >> 3] += stacks.get(sq, 1)
+        for sq in state.c_squares:
+            counts[8 + (sq >> 3)] += stacks.get(sq, 1)
+        return counts
+
+    def evaluate(self, boards):
+        # boards is an N x 16 array of counts, or a list of encoded boards
+        if numpy is None:
+            weights = self.weights
+            return [sum(count * weight for count, weight in zip(board, weights)) for board in boards]
+        return numpy.dot(numpy.asarray(boards, dtype=numpy.int64).reshape(-1, 16), self.vector).tolist()
+
+    def evaluate_states(self, states):
+        return self.evaluate([BatchEvaluator.encode(state) for state in states])
+
+    def children(self, game, state, actions):
+        # values of the states the actions lead to, in action order
+        boards = []
+        for a in actions:
+            token = game.apply(state, a)
+            boards.append(BatchEvaluator.encode(state))
+            game.undo(state, token)
+        return self.evaluate(boards)
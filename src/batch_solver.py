@@ -0,0 +1,119 @@
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from multiprocessing import Pool, cpu_count
+
+from hw1cs561s2018 import Chess, solve
+from position_cache import PositionCache
+
+# ______________________________________________________________________________
+# Batch solver
+# solves many input files in one pool of long-lived workers and prints one JSON line per file as it finishes
+
+
+def input_files(paths, pattern='input*.txt'):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, pattern))))
+        elif glob.has_magic(path):
+            files.extend(sorted(glob.glob(path)))
+        else:
+            files.append(path)
+    return files
+
+
+def output_file(path, output_dir):
+    name = os.path.basename(path)
+    if 'input' in name:
+        name = name.replace('input', 'output', 1)
+    else:
+        name = 'output_' + name
+    return os.path.join(output_dir, name)
+
+
+def solve_file(task):
+    path, output, cache = task
+    summary = {'input': path}
+    start = time.time()
+    try:
+        chess = Chess(path=path, configuration=None)
+        if cache:
+            table = PositionCache(cache, chess.config.player, chess.config.row_values)
+            try:
+                result = solve(chess, table=table)
+            finally:
+                table.close()
+        else:
+            result = solve(chess)
+        string = chess.translate(result)
+        summary['output'] = output
+        chess.write_to_file(string=string, path=summary['output'])
+    except Exception as e:
+        summary['error'] = '{}: {}'.format(e.__class__.__name__, e)
+        summary['time'] = time.time() - start
+        return summary
+    summary['time'] = time.time() - start
+    summary['algorithm'] = chess.config.algorithm
+    summary['depth'] = chess.config.depth_limit
+    summary['move'] = string.splitlines()[0]
+    summary['myopic'] = result[1]
+    summary['farsighted'] = result[2]
+    summary['nodes'] = result[3]
+    return summary
+
+
+def solve_files(files, output_dir, processes=None, cache=None):
+    # yields summaries in completion order, cache is an SQLite file the searches share across runs,
+    # an input whose output file an earlier input already writes to is not solved and reported as an error
+    if not os.path.isdir(output_dir):
+        os.makedirs(output_dir)
+    tasks = []
+    outputs = dict()
+    for path in files:
+        output = output_file(path, output_dir)
+        key = os.path.normcase(os.path.abspath(output))
+        if key in outputs:
+            yield {'input': path, 'error': 'OutputCollision: {} is already written for {}'.format(output, outputs[key]), 'time': 0.0}
+            continue
+        outputs[key] = path
+        tasks.append((path, output, cache))
+    processes = processes or cpu_count()
+    # a few chunks per worker keeps the queue traffic low on large batches without starving the last workers
+    chunksize = max(1, len(tasks) // (4 * processes))
+    pool = Pool(processes)
+    try:
+        for summary in pool.imap_unordered(solve_file, tasks, chunksize):
+            yield summary
+    finally:
+        pool.close()
+        pool.join()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Solve many input files and write one output file per input.')
+    parser.add_argument('inputs', nargs='+', help='input files, directories or glob patterns')
+    parser.add_argument('--pattern', default='input*.txt', help='file pattern used inside directories')
+    parser.add_argument('--output-dir', default='output', help='directory the output files are written to')
+    parser.add_argument('--processes', type=int, default=None, help='number of worker processes, one per CPU by default')
+    parser.add_argument('--cache', default=None, help='SQLite position cache shared by runs, only used by ALPHABETA, whose node counts then drop')
+    parser.add_argument('--summary', default=None, help='JSON lines summary file, standard output by default')
+    args = parser.parse_args(argv)
+    summary_file = args.summary and open(args.summary, 'w') or sys.stdout
+    failed = 0
+    try:
+        for summary in solve_files(input_files(args.inputs, args.pattern), args.output_dir, args.processes, args.cache):
+            failed += 'error' in summary
+            summary_file.write(json.dumps(summary, sort_keys=True) + '\n')
+            summary_file.flush()
+    finally:
+        if summary_file is not sys.stdout:
+            summary_file.close()
+    return failed and 1 or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,210 @@
+import argparse
+import json
+import random
+import sys
+import time
+from multiprocessing import Pipe, Process
+
+from batch_solver import input_files
+from hw1cs561s2018 import Chess, Configuration, SearchStats, alphabeta_cutoff_search, infinity, minimax_decision
+
+try:
+    import resource
+except ImportError:
+    resource = None
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+# ru_maxrss is in kilobytes, except on macOS where it is in bytes
+RSS_UNIT = sys.platform == 'darwin' and 1 or 1024
+
+# ______________________________________________________________________________
+# Memory benchmark
+# keeps every state up to some depth alive, the way a cache does, and reports what each of them costs
+
+
+def deep_size(objects, shared=()):
+    # bytes of the objects and everything they reference, an object referenced several times is counted once
+    # and the shared objects are not counted at all
+    seen = set(id(obj) for obj in shared)
+    pending = list(objects)
+    total = 0
+    while pending:
+        obj = pending.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            pending.extend(obj.keys())
+            pending.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            pending.extend(obj)
+        else:
+            for cls in type(obj).__mro__:
+                pending.extend(getattr(obj, name) for name in cls.__dict__.get('__slots__', ()) if hasattr(obj, name))
+            if hasattr(obj, '__dict__'):
+                pending.append(obj.__dict__)
+    return total
+
+
+def reachable_states(state, game, depth):
+    states = [state]
+    layer = [state]
+    for i in range(depth):
+        layer = [game.result(s, a) for s in layer if not game.terminal_test(s) for a in game.actions(s)]
+        states.extend(layer)
+    return states
+
+
+def memory_benchmark(state, game, depth=3):
+    states = reachable_states(state, game, depth)
+    # the row values are shared by every state of a game, so they are left out
+    size = deep_size(states, shared=[state.row_values])
+    return {'states': len(states), 'bytes': size, 'bytes_per_state': float(size) / len(states)}
+
+
+# ______________________________________________________________________________
+# Search benchmark
+# solves the input files and a fixed set of generated boards with both algorithms at several depths
+
+
+def generated_board(seed):
+    # a mid-game board with a few pieces per side on the dark squares, any side to move
+    rng = random.Random(seed)
+    dark = [(i, j) for i in range(8) for j in range(8) if (i + j) % 2 == 1]
+    squares = rng.sample(dark, rng.randint(6, 14))
+    half = len(squares) // 2
+    rows = [['0'] * 8 for i in range(8)]
+    for i, j in squares[:half]:
+        rows[i][j] = 'S1'
+    for i, j in squares[half:]:
+        rows[i][j] = 'C1'
+    row_values = sorted(rng.sample(range(1, 100), 8))
+    lines = [rng.choice(['Star', 'Circle']), 'ALPHABETA', '0'] + [','.join(row) for row in rows] + [','.join(map(str, row_values))]
+    configuration = Configuration(path=None)
+    configuration.generate_configuration_from_string('\n'.join(lines))
+    return configuration
+
+
+def benchmark_positions(paths, generated=5, seed=561):
+    positions = [(path, Chess(path=path, configuration=None)) for path in paths]
+    positions += [('generated{}'.format(seed + i), Chess(path=None, configuration=generated_board(seed + i))) for i in range(generated)]
+    return positions
+
+
+def search(chess, algorithm, depth, stats=None):
+    if algorithm == 'MINIMAX':
+        return minimax_decision(chess.initial_state, chess, depth, stats=stats)
+    return alphabeta_cutoff_search(chess.initial_state, chess, d=depth, stats=stats)
+
+
+def measure_search(chess, algorithm, depth, connection):
+    # a forked process starts with the resident size it was forked at as its peak, so what the peak grew by is the run's own
+    start = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    search(chess, algorithm, depth)
+    connection.send((resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - start) * RSS_UNIT)
+    connection.close()
+
+
+def peak_memory(chess, algorithm, depth):
+    # bytes a search of its own needs at its peak, measured in a fresh process where the resource module exists
+    # and traced where only tracemalloc does, None without either
+    if resource is not None:
+        receiver, sender = Pipe(False)
+        process = Process(target=measure_search, args=(chess, algorithm, depth, sender))
+        process.start()
+        sender.close()
+        try:
+            return receiver.recv()
+        finally:
+            receiver.close()
+            process.join()
+    if tracemalloc is not None:
+        tracemalloc.start()
+        try:
+            search(chess, algorithm, depth)
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return None
+
+
+def run_search(name, chess, algorithm, depth, repeat=3):
+    # the time is the best of repeat runs, memory is measured on a separate run since measuring slows the search,
+    # and is left out where it cannot be measured
+    elapsed = infinity
+    for i in range(repeat):
+        stats = SearchStats()
+        start = time.time()
+        result = search(chess, algorithm, depth, stats)
+        elapsed = min(elapsed, time.time() - start)
+    run = {'position': name, 'algorithm': algorithm, 'depth': depth, 'move': chess.translate(result).splitlines()[0], 'farsighted': result[2],
+           'nodes': result[3], 'visited': stats.visited(), 'time': elapsed, 'nodes_per_second': elapsed and stats.visited() / elapsed or 0.0}
+    memory = peak_memory(chess, algorithm, depth)
+    if memory is not None:
+        run['peak_memory'] = memory
+    return run
+
+
+def run_benchmark(positions, depths=(2, 4), algorithms=('MINIMAX', 'ALPHABETA'), repeat=3):
+    return [run_search(name, chess, algorithm, depth, repeat) for name, chess in positions for algorithm in algorithms for depth in depths]
+
+
+def compare(runs, baseline, threshold=0.25, min_time=0.01):
+    # a run regresses when it changes its decision, or when its time or visited nodes grow by more than threshold,
+    # times under min_time are mostly noise and are not compared
+    previous = dict(((run['position'], run['algorithm'], run['depth']), run) for run in baseline)
+    regressions = []
+    for run in runs:
+        old = previous.get((run['position'], run['algorithm'], run['depth']))
+        if old is None:
+            continue
+        reasons = []
+        if (run['move'], run['farsighted']) != (old['move'], old['farsighted']):
+            reasons.append('decision {} {} was {} {}'.format(run['move'], run['farsighted'], old['move'], old['farsighted']))
+        for metric in ('time', 'visited'):
+            if old[metric] and run[metric] > old[metric] * (1 + threshold) and (metric != 'time' or old[metric] >= min_time):
+                reasons.append('{} {:.4g} was {:.4g}'.format(metric, run[metric], old[metric]))
+        if reasons:
+            regressions.append({'position': run['position'], 'algorithm': run['algorithm'], 'depth': run['depth'], 'reasons': reasons})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the search on input files and generated boards.')
+    parser.add_argument('inputs', nargs='*', default=['../res'], help='input files, directories or glob patterns')
+    parser.add_argument('--depths', type=int, nargs='+', default=[2, 4], help='search depths')
+    parser.add_argument('--generated', type=int, default=5, help='number of generated boards')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per search, the fastest one is reported')
+    parser.add_argument('--seed', type=int, default=561, help='seed of the first generated board')
+    parser.add_argument('--output', default=None, help='JSON file the runs are written to, standard output by default')
+    parser.add_argument('--baseline', default=None, help='JSON file of earlier runs to compare against')
+    parser.add_argument('--threshold', type=float, default=0.25, help='relative growth of time or nodes reported as a regression')
+    parser.add_argument('--memory-depth', type=int, default=None, help='also report the bytes per state kept alive to this depth')
+    args = parser.parse_args(argv)
+    positions = benchmark_positions(input_files(args.inputs), args.generated, args.seed)
+    report = {'runs': run_benchmark(positions, args.depths, repeat=args.repeat)}
+    if args.memory_depth is not None:
+        report['memory'] = []
+        for name, chess in positions:
+            memory = memory_benchmark(chess.initial_state, chess, args.memory_depth)
+            memory['position'] = name
+            report['memory'].append(memory)
+    if args.baseline:
+        with open(args.baseline) as f:
+            report['regressions'] = compare(report['runs'], json.load(f)['runs'], args.threshold)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+    else:
+        sys.stdout.write(json.dumps(report, indent=2, sort_keys=True) + '\n')
+    for regression in report.get('regressions', []):
+        sys.stderr.write('{} {} depth {}: {}\n'.format(regression['position'], regression['algorithm'], regression['depth'], ', '.join(regression['reasons'])))
+    return report.get('regressions') and 1 or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
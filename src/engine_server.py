@@ -0,0 +1,207 @@
+import argparse
+import json
+import os
+import stat
+import sys
+import threading
+import time
+from collections import OrderedDict
+from multiprocessing import Pool, cpu_count
+
+from hw1cs561s2018 import Chess, Configuration, SearchStats, SearchTimeout, TranspositionTable, iterative_deepening_search, solve
+
+try:
+    import socketserver
+except ImportError:
+    import SocketServer as socketserver
+
+# ______________________________________________________________________________
+# Engine server
+# a resident engine that answers one JSON line per request, read from standard input or a Unix socket.
+# A request is {"id": ..., "position": "<the twelve lines of an input file>", "deadline": seconds}, with the
+# deadline optional. The searches run in a pool of long-lived workers, each of which keeps its tables warm
+# between requests, and at most max_pending requests are searched or queued at once.
+warm_tables = None
+
+
+def init_worker(table_size, max_contexts):
+    global warm_tables
+    warm_tables = WarmTables(table_size, max_contexts)
+
+
+class WarmTables:
+    # values are seen from the player of the input and depend on its row values, so each of those contexts
+    # has its own table and square values, the least recently used context is dropped first. Requests that
+    # mirror each other share table entries
+    def __init__(self, table_size=1 << 16, max_contexts=8):
+        self.table_size = table_size
+        self.max_contexts = max_contexts
+        self.contexts = OrderedDict()
+
+    def get(self, configuration):
+        context = (configuration.player, tuple(configuration.row_values))
+        entry = self.contexts.pop(context, None)
+        if entry is None:
+            entry = (TranspositionTable(self.table_size, symmetric=True), Chess.square_values(configuration.player, configuration.row_values))
+            if len(self.contexts) >= self.max_contexts:
+                self.contexts.popitem(last=False)
+        self.contexts[context] = entry
+        return entry
+
+
+def answer_request(task):
+    request, received = task
+    response = {'id': request.get('id')}
+    start = time.time()
+    try:
+        deadline = request.get('deadline')
+        end = None
+        if deadline is not None:
+            end = received + deadline
+            remaining = end - start
+            if remaining <= 0:
+                raise SearchTimeout('deadline passed before the search started')
+        configuration = Configuration(path=None)
+        configuration.generate_configuration_from_string(request['position'])
+        chess = Chess(path=None, configuration=configuration)
+        table, chess.square_values = warm_tables.get(configuration)
+        stats = SearchStats()
+        if deadline is not None and configuration.algorithm == 'ALPHABETA' and configuration.depth_limit > 0:
+            # the deepest search finished in time, its depth tells the caller how far it got
+            result = iterative_deepening_search(chess.initial_state, chess, depth_limit=configuration.depth_limit, time_limit=remaining, table=table,
+                                                stats=stats)
+            response['depth'] = result[4]
+        else:
+            # the other algorithms give up with SearchTimeout once the deadline passes
+            result = solve(chess, stats=stats, table=table, deadline=end)
+        string = chess.translate(result)
+    except Exception as e:
+        response['error'] = '{}: {}'.format(e.__class__.__name__, e)
+        response['time'] = time.time() - start
+        return response
+    response['time'] = time.time() - start
+    response['output'] = string
+    response['move'] = string.splitlines()[0]
+    response['myopic'] = result[1]
+    response['farsighted'] = result[2]
+    response['nodes'] = result[3]
+    response['table_hits'] = stats.table_hits
+    return response
+
+
+class EngineServer:
+    def __init__(self, processes=None, max_pending=None, reject=False, table_size=1 << 16, max_contexts=8):
+        # a full server makes submit wait for a free slot, which stops the reader and pushes back on the client,
+        # or with reject answers the request at once with a busy error
+        processes = processes or cpu_count()
+        self.max_pending = max_pending or 4 * processes
+        self.reject = reject
+        self.slots = threading.BoundedSemaphore(self.max_pending)
+        self.pool = Pool(processes, initializer=init_worker, initargs=(table_size, max_contexts))
+
+    def submit(self, line, callback):
+        # callback gets the response, from another thread unless the request is answered at once
+        received = time.time()
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict) or 'position' not in request:
+                raise ValueError('a request needs a position')
+        except ValueError as e:
+            callback({'id': None, 'error': '{}: {}'.format(e.__class__.__name__, e)})
+            return False
+        if not self.slots.acquire(not self.reject):
+            callback({'id': request.get('id'), 'error': 'busy: {} requests pending'.format(self.max_pending)})
+            return False
+
+        def done(response):
+            self.slots.release()
+            callback(response)
+
+        self.pool.apply_async(answer_request, ((request, received),), callback=done)
+        return True
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+
+
+def serve_lines(engine, lines, write):
+    # answers every request line through write and returns once all of them are answered
+    answered = threading.Condition()
+    pending = [0]
+
+    def callback(response):
+        with answered:
+            write(json.dumps(response, sort_keys=True) + '\n')
+            pending[0] -= 1
+            answered.notify()
+
+    for line in lines:
+        if not line.strip():
+            continue
+        with answered:
+            pending[0] += 1
+        engine.submit(line, callback)
+    with answered:
+        while pending[0]:
+            answered.wait()
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        def write(string):
+            # a client that went away gets no answers, the other connections go on
+            try:
+                self.wfile.write(string.encode('utf-8'))
+                self.wfile.flush()
+            except (IOError, OSError):
+                pass
+
+        lines = (line.decode('utf-8') for line in iter(self.rfile.readline, b''))
+        serve_lines(self.server.engine, lines, write)
+
+
+class SocketServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path, engine):
+        # a socket file left by an earlier server is replaced, any other file is kept
+        if os.path.exists(path) and stat.S_ISSOCK(os.stat(path).st_mode):
+            os.remove(path)
+        socketserver.UnixStreamServer.__init__(self, path, RequestHandler)
+        self.engine = engine
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Answer JSON line requests with a resident engine whose tables stay warm between requests.')
+    parser.add_argument('--socket', default=None, help='Unix socket to listen on, standard input and output by default')
+    parser.add_argument('--processes', type=int, default=None, help='number of worker processes, one per CPU by default')
+    parser.add_argument('--max-pending', type=int, default=None, help='requests searched or queued at once, four per worker by default')
+    parser.add_argument('--reject', action='store_true', help='answer requests over the limit with a busy error instead of waiting')
+    parser.add_argument('--table-size', type=int, default=1 << 16, help='transposition table slots per player and row values')
+    args = parser.parse_args(argv)
+    engine = EngineServer(args.processes, args.max_pending, args.reject, args.table_size)
+    try:
+        if args.socket:
+            server = SocketServer(args.socket, engine)
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+            finally:
+                server.server_close()
+                os.remove(args.socket)
+        else:
+            def write(string):
+                sys.stdout.write(string)
+                sys.stdout.flush()
+
+            # readline rather than iterating over the file, which reads ahead and holds requests back
+            serve_lines(engine, iter(sys.stdin.readline, ''), write)
+    finally:
+        engine.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
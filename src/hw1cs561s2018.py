@@ -1,43 +1,93 @@
+import copy
+import math
+import random
+import time
+from array import array
 from collections import namedtuple
 
 # ______________________________________________________________________________
 # Minimax Search
 infinity = float('inf')
 NOOP = 'Noop'
-node_counter = 1
+
+# ______________________________________________________________________________
+# Bitboards
+# square index is row * 8 + column, bit i of a side's board is set when that side occupies square i
+FULL_BOARD = (1 << 64) - 1
+NOT_ROW_0 = FULL_BOARD ^ 0xFF
+NOT_ROW_7 = FULL_BOARD ^ (0xFF << 56)
+BITS = [1 << i for i in range(64)]
+COORS = [(i // 8, i % 8) for i in range(64)]
+SQUARES = list(range(64))
+# every square reflected across the middle of the board, column j becomes column 7 - j
+MIRROR = [i // 8 * 8 + 7 - i % 8 for i in range(64)]
+
+# ______________________________________________________________________________
+# Zobrist keys
+# a position key is the xor of one random number per occupied square and side, a multiple of a
+# per-square number for stacked squares, and one number each for C to move and for either side having passed
+zobrist_random = random.Random(561)
+ZOBRIST_S = [zobrist_random.getrandbits(64) for i in range(64)]
+ZOBRIST_C = [zobrist_random.getrandbits(64) for i in range(64)]
+ZOBRIST_STACK = [zobrist_random.getrandbits(64) for i in range(64)]
+ZOBRIST_C_TO_MOVE = zobrist_random.getrandbits(64)
+ZOBRIST_S_NO_MOVE = zobrist_random.getrandbits(64)
+ZOBRIST_C_NO_MOVE = zobrist_random.getrandbits(64)
+# root results are kept under the position key xor this, apart from interior entries that may break ties differently
+ZOBRIST_ROOT = zobrist_random.getrandbits(64)
+
+# transposition table bound types
+EXACT = 0
+LOWER = 1
+UPPER = 2
 
 
-def minimax_decision(state, game, depth_limit=infinity):
-    global node_counter
-    node_counter = 1
+def minimax_decision(state, game, depth_limit=infinity, actions=None, stats=None, deadline=None):
+    # actions restricts the root to some of its moves, which lets root children be searched separately,
+    # and past the deadline the search gives up with SearchTimeout
+    if stats is None:
+        stats = SearchStats()
+    visited = stats.depth_nodes
     player = game.to_move(state)
 
     def max_value(state, depth):
+        visited[depth] = visited.get(depth, 0) + 1
         if game.terminal_test(state) or depth >= depth_limit:
+            stats.leaf_evaluations += 1
             # print "max"
             # print state.pieces
             # print game.utility(state, player)
             # print state.to_move
             return game.utility(state, player)
+        if deadline is not None and time.time() > deadline:
+            raise SearchTimeout()
         v = -infinity
         for a in game.actions(state):
             temp = v
-            v = max(v, min_value(game.result(state, a), depth + 1))
+            token = game.apply(state, a)
+            v = max(v, min_value(state, depth + 1))
+            game.undo(state, token)
             # if temp < v:
             #     print a
         return v
 
     def min_value(state, depth):
+        visited[depth] = visited.get(depth, 0) + 1
         if game.terminal_test(state) or depth >= depth_limit:
+            stats.leaf_evaluations += 1
             # print "min"
             # print state.pieces
             # print state.to_move
             # print game.utility(state, player)
             return game.utility(state, player)
+        if deadline is not None and time.time() > deadline:
+            raise SearchTimeout()
         v = infinity
         for a in game.actions(state):
             temp = v
-            v = min(v, max_value(game.result(state, a), depth + 1))
+            token = game.apply(state, a)
+            v = min(v, max_value(state, depth + 1))
+            game.undo(state, token)
             # if temp < v:
             #     print a
         return v
@@ -46,11 +96,11 @@ def minimax_decision(state, game, depth_limit=infinity):
         min_action = 'Noop'
         farsighted = state.utility
         myopic = state.utility
-        if state.is_only_one_play():
-            return min_action, myopic, farsighted, 1
-        else:
-            return min_action, myopic, farsighted, 3
-    actions = game.actions(state)
+        stats.nodes = state.is_only_one_play() and 1 or 3
+        stats.stop()
+        return min_action, myopic, farsighted, stats.nodes
+    visited[0] = visited.get(0, 0) + 1
+    actions = actions or game.actions(state)
     # print max(map(lambda a: min_value(game.result(state, a)), actions))
     if len(actions) > 0:
         # return max(map(lambda a: min_value(game.result(state, a), 0), actions))
@@ -66,48 +116,139 @@ def minimax_decision(state, game, depth_limit=infinity):
                 farsighted = result
                 min_action = a
                 myopic = result_state.utility
-    return min_action, myopic, farsighted, node_counter
+    # every generated state is counted, the root included
+    stats.nodes = sum(visited.values())
+    stats.stop()
+    return min_action, myopic, farsighted, stats.nodes
 
 
-def alphabeta_cutoff_search(state, game, d=4, cutoff_test=None, eval_fn=None):
+def alphabeta_cutoff_search(state, game, d=4, cutoff_test=None, eval_fn=None, table=None, deadline=None, ordering=None, actions=None, alpha=-infinity,
+                            beta=infinity, stats=None, tablebase=None, batch=None, lazy=False):
+    # stats may be shared by several searches, its counters add up but nodes is the count of the last one,
+    # with a root window the action is None when every move fails low, and the first move worth beta or more is returned at once,
+    # a position the tablebase knows is not searched any further and gets its exact value,
+    # with a batch evaluator the children of the last ply are encoded together and valued in one call,
+    # lazy nodes generate their moves captures first and only as far as the search gets before it prunes
     player = game.to_move(state)
-    node_counter = [2]
+    if stats is None:
+        stats = SearchStats()
+    stats.nodes = 2
+    visited = stats.depth_nodes
 
     # Functions used by alphabeta
     def max_value(state, alpha, beta, depth):
+        visited[depth] = visited.get(depth, 0) + 1
+        if tablebase is not None:
+            v = tablebase.probe(state, player)
+            if v is not None:
+                stats.tablebase_hits += 1
+                return v
         if cutoff_test(state, depth):
+            stats.leaf_evaluations += 1
             return eval_fn(state)
+        if deadline is not None and time.time() > deadline:
+            raise SearchTimeout()
+        if lazy and ordering is None and not (bulk and depth + 1 >= d):
+            actions = game.lazy_actions(state)
+        else:
+            actions = game.actions(state)
+            if ordering is not None:
+                actions = ordering.order(actions, depth)
+        if table is not None:
+            key, value, actions = table.lookup(state, d - depth, alpha, beta, actions, stats)
+            if value is not None:
+                return value
+            alpha_original = alpha
         v = -infinity
-        for a in game.actions(state):
-            v = max(v, min_value(game.result(state, a),
-                                 alpha, beta, depth + 1))
-            if v >= beta[0]:
+        best_move = None
+        values = None
+        if bulk and depth + 1 >= d:
+            values = batch.children(game, state, actions)
+        for i, a in enumerate(actions):
+            if values is None:
+                token = game.apply(state, a)
+                child = min_value(state, alpha, beta, depth + 1)
+                game.undo(state, token)
+            else:
+                visited[depth + 1] = visited.get(depth + 1, 0) + 1
+                stats.leaf_evaluations += 1
+                child = values[i]
+            if child > v:
+                v = child
+                best_move = a
+            if v >= beta:
+                if table is not None:
+                    table.record(key, state, d - depth, v, alpha_original, beta, best_move)
+                if ordering is not None:
+                    ordering.cutoff(best_move, depth, d - depth)
+                stats.cutoff(i)
                 return v
-            node_counter[0] += 1
-            alpha[0] = max(alpha[0], v)
+            stats.nodes += 1
+            alpha = max(alpha, v)
+        if table is not None:
+            table.record(key, state, d - depth, v, alpha_original, beta, best_move)
         return v
 
     def min_value(state, alpha, beta, depth):
+        visited[depth] = visited.get(depth, 0) + 1
+        if tablebase is not None:
+            v = tablebase.probe(state, player)
+            if v is not None:
+                stats.tablebase_hits += 1
+                return v
         if cutoff_test(state, depth):
+            stats.leaf_evaluations += 1
             return eval_fn(state)
+        if deadline is not None and time.time() > deadline:
+            raise SearchTimeout()
+        if lazy and ordering is None and not (bulk and depth + 1 >= d):
+            actions = game.lazy_actions(state)
+        else:
+            actions = game.actions(state)
+            if ordering is not None:
+                actions = ordering.order(actions, depth)
+        if table is not None:
+            key, value, actions = table.lookup(state, d - depth, alpha, beta, actions, stats)
+            if value is not None:
+                return value
+            beta_original = beta
         v = infinity
-        for a in game.actions(state):
-            v = min(v, max_value(game.result(state, a),
-                                 alpha, beta, depth + 1))
-            if v <= alpha[0]:
+        best_move = None
+        values = None
+        if bulk and depth + 1 >= d:
+            values = batch.children(game, state, actions)
+        for i, a in enumerate(actions):
+            if values is None:
+                token = game.apply(state, a)
+                child = max_value(state, alpha, beta, depth + 1)
+                game.undo(state, token)
+            else:
+                visited[depth + 1] = visited.get(depth + 1, 0) + 1
+                stats.leaf_evaluations += 1
+                child = values[i]
+            if child < v:
+                v = child
+                best_move = a
+            if v <= alpha:
+                if table is not None:
+                    table.record(key, state, d - depth, v, alpha, beta_original, best_move)
+                if ordering is not None:
+                    ordering.cutoff(best_move, depth, d - depth)
+                stats.cutoff(i)
                 return v
-            node_counter[0] += 1
-            beta[0] = min(beta[0], v)
+            stats.nodes += 1
+            beta = min(beta, v)
+        if table is not None:
+            table.record(key, state, d - depth, v, alpha, beta_original, best_move)
         return v
 
     # Body of alphabeta_cutoff_search starts here:
+    bulk = batch is not None and cutoff_test is None and eval_fn is None and tablebase is None
     # The default test cuts off at depth d or at a terminal state
     cutoff_test = (cutoff_test or
                    (lambda state, depth: depth >= d or
                                          game.terminal_test(state)))
     eval_fn = eval_fn or (lambda state: game.utility(state, player))
-    alpha = [-infinity]
-    beta = [infinity]
     best_action = None
     myopic = None
     # Body of minimax_decision:
@@ -115,18 +256,555 @@ def alphabeta_cutoff_search(state, game, d=4, cutoff_test=None, eval_fn=None):
         min_action = 'Noop'
         farsighted = state.utility
         myopic = state.utility
-        if state.is_only_one_play():
-            return min_action, myopic, farsighted, 1
+        stats.nodes = state.is_only_one_play() and 1 or 3
+        stats.stop()
+        return min_action, myopic, farsighted, stats.nodes
+    visited[0] = visited.get(0, 0) + 1
+    full_window = actions is None and alpha == -infinity and beta == infinity
+    if table is not None:
+        table.new_search()
+        entry = full_window and table.probe(state.key ^ ZOBRIST_ROOT)
+        if entry and entry[1] == d:
+            # a root searched before to the same depth, the node count is what this search did
+            stats.table_hits += 1
+            stats.table_cutoffs += 1
+            stats.stop()
+            return entry[4], game.result(state, entry[4]).utility, entry[2], stats.nodes
+    for a in actions or game.actions(state):
+        result = game.result(state, a)
+        v = min_value(result, alpha, beta, 1)
+        if v > alpha:
+            alpha = v
+            best_action = a
+            myopic = result.utility
+            if v >= beta:
+                break
+    if table is not None and full_window:
+        table.store(state.key ^ ZOBRIST_ROOT, d, alpha, EXACT, best_action)
+    stats.stop()
+    return (best_action, myopic, alpha, stats.nodes)
+
+
+def aspiration_search(state, game, d=4, estimate=0, window=20, growth=4, table=None, deadline=None, ordering=None, stats=None, max_re_searches=8):
+    # searches a window of window around estimate first and widens the side that fails by growth until the value lands inside,
+    # a value strictly inside the window gives the full window decision, ties included, and after max_re_searches failed
+    # windows the full window is searched
+    check_window(window, growth)
+    if stats is None:
+        stats = SearchStats()
+    low = high = window
+    for i in range(max_re_searches):
+        alpha = estimate - low
+        beta = estimate + high
+        result = alphabeta_cutoff_search(state, game, d=d, table=table, deadline=deadline, ordering=ordering, alpha=alpha, beta=beta, stats=stats)
+        if result[0] is None:
+            stats.fail_lows += 1
+            low *= growth
+        elif result[2] >= beta:
+            stats.fail_highs += 1
+            high *= growth
+        else:
+            return result
+    return alphabeta_cutoff_search(state, game, d=d, table=table, deadline=deadline, ordering=ordering, stats=stats)
+
+
+def check_window(window, growth):
+    # a window that never widens fails on the same bounds forever
+    if not window > 0:
+        raise ValueError('aspiration window must be positive, got {}'.format(window))
+    if not growth > 1:
+        raise ValueError('aspiration growth must be greater than 1, got {}'.format(growth))
+
+
+def negamax_value(state, game, player, d, alpha, beta, depth, table=None, ordering=None, stats=None, deadline=None):
+    # fail-soft negamax, every node is valued for its own side to move so a pass needs no special case, and table
+    # entries are kept in that frame too and must not be shared with alphabeta_cutoff_search. Later moves are first
+    # tried with a window of one, which proves whether they beat the first since utilities are integers, so a null
+    # window (alpha, alpha + 1) is searched as plain alpha-beta. Past the deadline it gives up with SearchTimeout
+    visited = stats.depth_nodes
+    visited[depth] = visited.get(depth, 0) + 1
+    if depth >= d or game.terminal_test(state):
+        stats.leaf_evaluations += 1
+        v = game.utility(state, player)
+        return state.to_move == player and v or -v
+    if deadline is not None and time.time() > deadline:
+        raise SearchTimeout()
+    actions = game.actions(state)
+    if ordering is not None:
+        actions = ordering.order(actions, depth)
+    if table is not None:
+        key, value, actions = table.lookup(state, d - depth, alpha, beta, actions, stats)
+        if value is not None:
+            return value
+    alpha_original = alpha
+    v = -infinity
+    best_move = None
+    for i, a in enumerate(actions):
+        token = game.apply(state, a)
+        if i == 0:
+            child = -negamax_value(state, game, player, d, -beta, -alpha, depth + 1, table, ordering, stats, deadline)
         else:
-            return min_action, myopic, farsighted, 3
+            child = -negamax_value(state, game, player, d, -alpha - 1, -alpha, depth + 1, table, ordering, stats, deadline)
+            if alpha < child < beta:
+                stats.re_searches += 1
+                child = -negamax_value(state, game, player, d, -beta, -alpha, depth + 1, table, ordering, stats, deadline)
+        game.undo(state, token)
+        if child > v:
+            v = child
+            best_move = a
+        if v >= beta:
+            if table is not None:
+                table.record(key, state, d - depth, v, alpha_original, beta, best_move)
+            if ordering is not None:
+                ordering.cutoff(best_move, depth, d - depth)
+            stats.cutoff(i)
+            return v
+        alpha = max(alpha, v)
+    if table is not None:
+        table.record(key, state, d - depth, v, alpha_original, beta, best_move)
+    return v
+
+
+def principal_variation_search(state, game, d=4, table=None, ordering=None, stats=None, deadline=None):
+    # negamax_value below a root that keeps generation order
+    player = game.to_move(state)
+    if stats is None:
+        stats = SearchStats()
+    visited = stats.depth_nodes
+
+    def pvs(state, alpha, beta, depth):
+        return negamax_value(state, game, player, d, alpha, beta, depth, table, ordering, stats, deadline)
+
+    if game.terminal_test(state):
+        stats.nodes = state.is_only_one_play() and 1 or 3
+        stats.stop()
+        return 'Noop', state.utility, state.utility, stats.nodes
+    visited[0] = visited.get(0, 0) + 1
+    if table is not None:
+        table.new_search()
+    # the root keeps generation order and only a strictly better move replaces the best one, like the other engines
+    alpha = -infinity
+    best_action = None
+    myopic = None
     for a in game.actions(state):
         result = game.result(state, a)
-        v = min_value(result, alpha, beta, 1)
-        if v > alpha[0]:
-            alpha[0] = v
+        if best_action is None:
+            v = -pvs(result, -infinity, infinity, 1)
+        else:
+            v = -pvs(result, -alpha - 1, -alpha, 1)
+            if v > alpha:
+                stats.re_searches += 1
+                v = -pvs(result, -infinity, -alpha, 1)
+        if v > alpha:
+            alpha = v
             best_action = a
             myopic = result.utility
-    return (best_action, myopic, alpha[0], node_counter[0])
+    stats.nodes = stats.visited()
+    stats.stop()
+    return best_action, myopic, alpha, stats.nodes
+
+
+def mtdf_search(state, game, d=4, guess=None, table=None, ordering=None, stats=None, deadline=None):
+    # converges on the root value with null-window searches that share one table, guess is where the first
+    # window goes and defaults to the static value of the root, a close guess like the last move's value saves passes
+    player = game.to_move(state)
+    if stats is None:
+        stats = SearchStats()
+    if table is None:
+        table = TranspositionTable()
+
+    def search(state, beta, depth):
+        # whether the value of the node reaches beta, valued for the side to move like principal_variation_search
+        return negamax_value(state, game, player, d, beta - 1, beta, depth, table, ordering, stats, deadline)
+
+    if game.terminal_test(state):
+        stats.nodes = state.is_only_one_play() and 1 or 3
+        stats.stop()
+        return 'Noop', state.utility, state.utility, stats.nodes
+    table.new_search()
+    value = guess
+    if value is None:
+        value = game.utility(state, player)
+    lower = -infinity
+    upper = infinity
+    # the passes make their moves on a copy, so a search that times out leaves the caller's state as it was
+    root = state.copy()
+    # utilities are integers, so each pass asks whether the value reaches beta with the window (beta - 1, beta)
+    while lower < upper:
+        beta = value
+        if value == lower:
+            beta = value + 1
+        value = search(root, beta, 0)
+        stats.passes += 1
+        if value < beta:
+            upper = value
+        else:
+            lower = value
+    # no move is worth more than the value, so the first one that reaches it is the move the other engines pick
+    for a in game.actions(state):
+        result = game.result(state, a)
+        if -search(result, -value + 1, 1) >= value:
+            break
+    stats.nodes = stats.visited()
+    stats.stop()
+    return a, result.utility, value, stats.nodes
+
+
+def iterative_deepening_search(state, game, depth_limit=infinity, time_limit=None, table=None, ordering=None, stats=None, window=None, growth=4):
+    # searches depth 1, 2, ... and returns the last completed result with the depth it reached appended,
+    # the table carries each iteration's best moves into the next one, and with a window every iteration
+    # after the first is an aspiration search around the value of the one before
+    if window is not None:
+        check_window(window, growth)
+    deadline = None
+    if time_limit is not None:
+        deadline = time.time() + time_limit
+    if table is None:
+        table = TranspositionTable()
+    if ordering is None:
+        ordering = MoveOrdering()
+    depth_limit = min(depth_limit, game.max_plies(state))
+    result = alphabeta_cutoff_search(state, game, d=1, table=table, ordering=ordering, stats=stats)
+    depth = 1
+    if game.terminal_test(state):
+        return result + (0,)
+    while depth < depth_limit:
+        try:
+            if window is None:
+                result = alphabeta_cutoff_search(state, game, d=depth + 1, table=table, deadline=deadline, ordering=ordering, stats=stats)
+            else:
+                result = aspiration_search(state, game, d=depth + 1, estimate=result[2], window=window, growth=growth, table=table, deadline=deadline,
+                                           ordering=ordering, stats=stats)
+        except SearchTimeout:
+            break
+        depth += 1
+    return result + (depth,)
+
+
+# ______________________________________________________________________________
+# Monte Carlo tree search
+# the tree lives in parallel arrays indexed by node, the children of a node are expanded together and stored
+# next to each other, and no state is kept: every iteration makes the moves of its path on the root state and
+# takes them back once its playout is scored. A playout plays random moves to the end of the game, preferring
+# jumps, and its final utility, scaled into [0, 1], is the reward backed up along the path.
+
+
+class MonteCarloTree:
+    def __init__(self, state, game, exploration=1.4, capture_bias=0.8, seed=0):
+        self.state = state.copy()
+        self.game = game
+        self.player = game.to_move(state)
+        self.exploration = exploration
+        self.capture_bias = capture_bias
+        self.random = random.Random(seed)
+        # no utility can go beyond every piece on the row worth the most
+        pieces = sum(state.stacks.get(sq, 1) for sq in state.s_squares) + sum(state.stacks.get(sq, 1) for sq in state.c_squares)
+        self.scale = float(pieces * max(abs(value) for value in state.row_values) or 1)
+        self.moves = [None]
+        self.first_child = array('i', [-1])
+        self.child_count = array('i', [0])
+        self.visits = array('i', [0])
+        self.rewards = array('d', [0.0])
+        self.utilities = array('d', [0.0])
+        self.depth_nodes = {0: 1}
+        self.expand(0, self.state, 0)
+
+    def expand(self, node, state, depth):
+        self.first_child[node] = len(self.moves)
+        if self.game.terminal_test(state):
+            return
+        # moves of stacked pieces are listed once per piece, the tree keeps one child per distinct move
+        actions = []
+        for a in self.game.actions(state):
+            if a not in actions:
+                actions.append(a)
+        self.child_count[node] = len(actions)
+        self.moves.extend(actions)
+        self.first_child.extend([-1] * len(actions))
+        self.child_count.extend([0] * len(actions))
+        self.visits.extend([0] * len(actions))
+        self.rewards.extend([0.0] * len(actions))
+        self.utilities.extend([0.0] * len(actions))
+        self.depth_nodes[depth + 1] = self.depth_nodes.get(depth + 1, 0) + len(actions)
+
+    def select(self, node, maximize):
+        # the first child never visited, otherwise the one with the best upper confidence bound for the side to move
+        bonus = self.exploration * math.sqrt(math.log(max(self.visits[node], 1)))
+        best = None
+        best_score = -infinity
+        for child in range(self.first_child[node], self.first_child[node] + self.child_count[node]):
+            visits = self.visits[child]
+            if visits == 0:
+                return child
+            mean = self.rewards[child] / visits
+            if not maximize:
+                mean = 1 - mean
+            score = mean + bonus / math.sqrt(visits)
+            if score > best_score:
+                best = child
+                best_score = score
+        return best
+
+    def playout(self, state):
+        game = self.game
+        tokens = []
+        while not game.terminal_test(state):
+            actions = game.actions(state)
+            jumps = [a for a in actions if a != NOOP and abs(a[0][0] - a[1][0]) == 2]
+            if jumps and self.random.random() < self.capture_bias:
+                actions = jumps
+            tokens.append(game.apply(state, self.random.choice(actions)))
+        utility = game.utility(state, self.player)
+        for token in reversed(tokens):
+            game.undo(state, token)
+        return utility
+
+    def iterate(self):
+        game = self.game
+        state = self.state
+        node = 0
+        path = [0]
+        tokens = []
+        while True:
+            if self.first_child[node] < 0:
+                # a leaf is expanded on its second visit, its first one is a playout from the leaf itself
+                if self.visits[node] == 0:
+                    break
+                self.expand(node, state, len(tokens))
+            if self.child_count[node] == 0:
+                break
+            node = self.select(node, game.to_move(state) == self.player)
+            tokens.append(game.apply(state, self.moves[node]))
+            path.append(node)
+        utility = self.playout(state)
+        for token in reversed(tokens):
+            game.undo(state, token)
+        reward = (utility / self.scale + 1) / 2
+        for node in path:
+            self.visits[node] += 1
+            self.rewards[node] += reward
+            self.utilities[node] += utility
+
+    def search(self, iterations=None, deadline=None):
+        # runs until iterations are done or the deadline passes, whichever comes first
+        i = 0
+        while (iterations is None or i < iterations) and (deadline is None or time.time() < deadline):
+            self.iterate()
+            i += 1
+        return i
+
+    def root_children(self):
+        # (move, visits, sum of the final utilities) of every root move, in generation order
+        first = self.first_child[0]
+        return [(self.moves[child], self.visits[child], self.utilities[child]) for child in range(first, first + self.child_count[0])]
+
+
+def mcts_decision(state, game, children, nodes):
+    # the most visited root move, valued by the average final utility of its playouts
+    best = None
+    for child in children:
+        if best is None or child[1] > best[1]:
+            best = child
+    myopic = game.result(state, best[0]).utility
+    farsighted = int(round(best[2] / best[1])) if best[1] else myopic
+    return best[0], myopic, farsighted, nodes
+
+
+def mcts_search(state, game, iterations=1000, time_limit=None, exploration=1.4, capture_bias=0.8, seed=0, stats=None):
+    # nodes counts the root and every node the tree expanded
+    if stats is None:
+        stats = SearchStats()
+    if game.terminal_test(state):
+        stats.nodes = state.is_only_one_play() and 1 or 3
+        stats.stop()
+        return 'Noop', state.utility, state.utility, stats.nodes
+    deadline = None
+    if time_limit is not None:
+        deadline = time.time() + time_limit
+    tree = MonteCarloTree(state, game, exploration, capture_bias, seed)
+    tree.search(iterations, deadline)
+    stats.depth_nodes = tree.depth_nodes
+    stats.leaf_evaluations += tree.visits[0]
+    stats.nodes = stats.visited()
+    stats.stop()
+    return mcts_decision(state, game, tree.root_children(), stats.nodes)
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+class SearchStats:
+    # what one search did, nodes is the count the output file asks for and depth_nodes the states it actually visited
+    def __init__(self):
+        self.nodes = 0
+        self.depth_nodes = dict()
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.leaf_evaluations = 0
+        self.table_hits = 0
+        self.table_cutoffs = 0
+        self.re_searches = 0
+        self.passes = 0
+        self.fail_lows = 0
+        self.fail_highs = 0
+        self.tablebase_hits = 0
+        self.start = time.time()
+        self.elapsed = 0.0
+
+    def cutoff(self, index):
+        self.cutoffs += 1
+        if index == 0:
+            self.first_move_cutoffs += 1
+
+    def stop(self):
+        self.elapsed = time.time() - self.start
+
+    def visited(self):
+        return sum(self.depth_nodes.values())
+
+    def first_move_cutoff_rate(self):
+        return self.cutoffs and float(self.first_move_cutoffs) / self.cutoffs or 0.0
+
+    def nodes_per_second(self):
+        return self.elapsed and self.visited() / self.elapsed or 0.0
+
+    def report(self):
+        depth_nodes = [self.depth_nodes.get(depth, 0) for depth in range(max(self.depth_nodes or [-1]) + 1)]
+        return {'nodes': self.nodes, 'visited': self.visited(), 'depth_nodes': depth_nodes,
+                'cutoffs': self.cutoffs, 'first_move_cutoff_rate': self.first_move_cutoff_rate(), 'leaf_evaluations': self.leaf_evaluations,
+                'table_hits': self.table_hits, 'table_cutoffs': self.table_cutoffs, 're_searches': self.re_searches, 'passes': self.passes,
+                'fail_lows': self.fail_lows, 'fail_highs': self.fail_highs, 'tablebase_hits': self.tablebase_hits, 'elapsed': self.elapsed, 'nodes_per_second': self.nodes_per_second()}
+
+
+class TranspositionTable:
+    symmetric = False
+
+    def __init__(self, size=1 << 16, symmetric=False):
+        # a fixed number of slots indexed by key, so memory stays bounded however long the search runs,
+        # a symmetric table keeps a position and its mirror image in one entry
+        self.size = size
+        self.entries = [None] * size
+        self.generation = 0
+        self.symmetric = symmetric
+
+    def key(self, state):
+        if self.symmetric:
+            return state.canonical_key()
+        return state.key
+
+    @staticmethod
+    def oriented(move, key, state):
+        # entries keep their moves in the orientation of the position the key belongs to, so a move of an entry
+        # under the mirror image's key is reflected on the way in and out
+        if key == state.key or move is None or move == NOOP:
+            return move
+        return (move[0][0], 7 - move[0][1]), (move[1][0], 7 - move[1][1])
+
+    def probe(self, key):
+        entry = self.entries[key % self.size]
+        if entry is not None and entry[0] == key:
+            return entry
+        return None
+
+    def store(self, key, depth, value, bound, move):
+        index = key % self.size
+        entry = self.entries[index]
+        # a slot keeps the deeper of two entries from the same search, older searches are always replaced
+        if entry is None or entry[0] == key or entry[5] != self.generation or depth >= entry[1]:
+            self.entries[index] = (key, depth, value, bound, move, self.generation)
+
+    def new_search(self):
+        self.generation += 1
+
+    def lookup(self, state, remaining, alpha, beta, actions, stats):
+        # the key of the node, the value of an entry of the same depth that settles it with the window (alpha, beta) or None,
+        # and the actions with the entry's move first
+        key = self.key(state)
+        entry = self.probe(key)
+        if entry is None:
+            return key, None, actions
+        stats.table_hits += 1
+        if entry[1] == remaining and (entry[3] == EXACT or entry[3] == LOWER and entry[2] >= beta or entry[3] == UPPER and entry[2] <= alpha):
+            stats.table_cutoffs += 1
+            return key, entry[2], actions
+        return key, None, TranspositionTable.order(actions, self.oriented(entry[4], key, state))
+
+    def record(self, key, state, remaining, value, alpha, beta, move):
+        # the bound a value searched with the window (alpha, beta) the node was entered with proves
+        bound = value <= alpha and UPPER or value >= beta and LOWER or EXACT
+        self.store(key, remaining, value, bound, self.oriented(move, key, state))
+
+    @staticmethod
+    def order(actions, move):
+        if move is not None and not isinstance(actions, list):
+            return TranspositionTable.lazy_order(actions, move)
+        if move is None or move not in actions:
+            return actions
+        index = actions.index(move)
+        return [move] + actions[:index] + actions[index + 1:]
+
+    @staticmethod
+    def lazy_order(actions, move):
+        # the move first, then the generated moves without one copy of it
+        yield move
+        skipped = False
+        for a in actions:
+            if a == move and not skipped:
+                skipped = True
+                continue
+            yield a
+
+    @staticmethod
+    def pack_move(move):
+        # a move as a small integer for tables kept outside Python objects
+        if move is None:
+            return 0
+        if move == NOOP:
+            return 1
+        return 2 + (move[0][0] * 8 + move[0][1]) * 64 + move[1][0] * 8 + move[1][1]
+
+    @staticmethod
+    def unpack_move(code):
+        if code == 0:
+            return None
+        if code == 1:
+            return NOOP
+        original, destination = divmod(code - 2, 64)
+        return (original // 8, original % 8), (destination // 8, destination % 8)
+
+
+class MoveOrdering:
+    def __init__(self):
+        # up to two quiet moves per ply that caused a cutoff, newest first
+        self.killers = dict()
+        # cutoff credit per move, kept for the whole search
+        self.history = dict()
+
+    def order(self, actions, depth):
+        # jumps first, then this ply's killer moves, then everything else by history, ties keep generation order
+        if len(actions) < 2:
+            return actions
+        killers = self.killers.get(depth, ())
+        history = self.history
+
+        def rank(a):
+            if a[1][0] - a[0][0] in (2, -2):
+                return 2, history.get(a, 0)
+            if a in killers:
+                return 1, -killers.index(a)
+            return 0, history.get(a, 0)
+
+        return sorted(actions, key=rank, reverse=True)
+
+    def cutoff(self, move, depth, remaining):
+        if move == NOOP or move[1][0] - move[0][0] in (2, -2):
+            return
+        killers = self.killers.setdefault(depth, [])
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[2:]
+        self.history[move] = self.history.get(move, 0) + remaining * remaining
 
 
 class Game:
@@ -137,6 +815,17 @@ class Game:
     def result(self, state, move):
         raise NotImplementedError
 
+    def lazy_actions(self, state):
+        # the same moves as actions, generated one at a time in whatever order is cheapest
+        return iter(self.actions(state))
+
+    def apply(self, state, move):
+        # makes the move on state in place, returns what undo needs to take it back
+        raise NotImplementedError
+
+    def undo(self, state, token):
+        raise NotImplementedError
+
     def utility(self, state, player):
         raise NotImplementedError
 
@@ -149,6 +838,9 @@ class Game:
     def to_move(self, state):
         return state.to_move
 
+    def max_plies(self, state):
+        return infinity
+
     def display(self, state):
         print(state)
 
@@ -156,14 +848,20 @@ class Game:
         return '<{}>'.format(self.__class__.__name__)
 
     def play_game(self, *players):
-        state = self.initial
-        while True:
+        state = self.initial_state
+        try:
+            while True:
+                for player in players:
+                    move = player(self, state)
+                    state = self.result(state, move)
+                    if self.terminal_test(state):
+                        self.display(state)
+                        return self.utility(state, self.to_move(self.initial_state))
+        finally:
+            # players that search in the background stop with the game
             for player in players:
-                move = player(self, state)
-                state = self.result(state, move)
-                if self.terminal_test(state):
-                    self.display(state)
-                    return self.utility(state, self.to_move(self.initial))
+                if hasattr(player, 'stop'):
+                    player.stop()
 
 
 class Chess(Game):
@@ -171,55 +869,60 @@ class Chess(Game):
     def actions(self, state):
         return state.moves(state.to_move)
 
+    def lazy_actions(self, state):
+        return state.generate_moves(state.to_move)
+
     def result(self, state, move_action):
-        global node_counter
-        node_counter = node_counter + 1
-        new_s_pieces = []
-        new_c_pieces = []
-        if move_action == NOOP:
-            new_state = state
-            if state.to_move == 'S':
-                state.s_no_move = True
-            else:
-                state.c_no_move = True
-            new_state.to_move = state.to_move == 'S' and 'C' or 'S'
-            return new_state
-        move = None
-        original = move_action[0]
-        destination = move_action[1]
-        eaten = None
-        if original[0] - destination[0] == 2 and original[1] - destination[1] == 2:
-            eaten = (original[0] - 1, original[1] - 1)
-        if original[0] - destination[0] == -2 and original[1] - destination[1] == 2:
-            eaten = (original[0] + 1, original[1] - 1)
-        if original[0] - destination[0] == 2 and original[1] - destination[1] == -2:
-            eaten = (original[0] - 1, original[1] + 1)
-        if original[0] - destination[0] == -2 and original[1] - destination[1] == -2:
-            eaten = (original[0] + 1, original[1] + 1)
-        for p in state.s_pieces + state.c_pieces:
-            if p.coor == original:
-                new_piece = Piece(type=p.type, coor=destination)
-                move = p.type
-                if p.type == 'S':
-                    new_s_pieces.append(new_piece)
-                else:
-                    new_c_pieces.append(new_piece)
-            elif p.coor == eaten:
-                pass
-            else:
-                new_piece = Piece(type=p.type, coor=p.coor)
-                if p.type == 'S':
-                    new_s_pieces.append(new_piece)
-                else:
-                    new_c_pieces.append(new_piece)
-        to_move = move == 'S' and 'C' or 'S'
-        utility = Chess.evaluation(s_pieces=new_s_pieces, c_pieces=new_c_pieces, player=self.config.player, row_values=self.config.row_values)
-        return GameState(to_move=to_move, utility=utility, s_pieces=new_s_pieces, c_pieces=new_c_pieces, row_values=self.config.row_values)
+        new_state = state.copy()
+        new_state.apply(move_action, self.square_values)
+        if self.verify:
+            self.check(new_state)
+        return new_state
+
+    def apply(self, state, move_action):
+        # like result, but changes state in place and returns the token undo needs to take the move back
+        token = state.apply(move_action, self.square_values)
+        if self.verify:
+            self.check(state)
+        return token
+
+    def undo(self, state, token):
+        state.undo(token)
+
+    def check(self, state):
+        assert state.utility == Chess.evaluation(state.s_pieces, state.c_pieces, self.config.player, self.config.row_values)
+        assert state.key == state.zobrist()
 
     def utility(self, state, player):
         return state.utility
 
-    def __init__(self, path, configuration):
+    def viewed_by(self, player):
+        # the same game valued from player, whose search maximizes its own side
+        configuration = copy.copy(self.config)
+        configuration.player = player
+        return Chess(path=None, configuration=configuration, verify=self.verify)
+
+    def view(self, state, game):
+        # a state of game valued like the states of this game, which may be played by the other side or value the rows differently
+        if game.config.player == self.config.player and game.config.row_values == self.config.row_values:
+            return state
+        state = state.copy()
+        if game.config.row_values == self.config.row_values:
+            # the two sides value every position as each other's negation
+            state.utility = -state.utility
+        else:
+            state.utility = Chess.evaluation(state.s_pieces, state.c_pieces, self.config.player, self.config.row_values)
+            state.row_values = self.config.row_values
+        return state
+
+    def max_plies(self, state):
+        # every move takes a piece at least one row closer to its goal row, and two passes in a row end the game
+        distance = sum(sq // 8 * state.stacks.get(sq, 1) for sq in state.s_squares) + sum((7 - sq // 8) * state.stacks.get(sq, 1) for sq in state.c_squares)
+        return 2 * distance + 2
+
+    def __init__(self, path, configuration, verify=False):
+        # verify recomputes the utility and key of every child from scratch and checks them against the incremental ones
+        self.verify = verify
         if configuration:
             self.config = configuration
         else:
@@ -238,10 +941,20 @@ class Chess(Game):
                             s_pieces.append(piece)
                         else:
                             c_pieces.append(piece)
+        self.square_values = Chess.square_values(self.config.player, self.config.row_values)
         utility = Chess.evaluation(s_pieces, c_pieces, self.config.player, self.config.row_values)
-        game_state = GameState(to_move=to_move, utility=utility, s_pieces=s_pieces, c_pieces=c_pieces, row_values=self.config.row_values)
+        game_state = GameState.from_pieces(to_move=to_move, utility=utility, s_pieces=s_pieces, c_pieces=c_pieces, row_values=self.config.row_values)
         self.initial_state = game_state
 
+    @staticmethod
+    def square_values(player, row_values):
+        # value of one S piece and one C piece on every square, seen from player
+        s_values = [row_values[7 - i // 8] for i in range(64)]
+        c_values = [row_values[i // 8] for i in range(64)]
+        if player == 'S':
+            return s_values, [-value for value in c_values]
+        return [-value for value in s_values], c_values
+
     @staticmethod
     def evaluation(s_pieces, c_pieces, player, row_values):
         utility_value = 0
@@ -286,99 +999,262 @@ class Chess(Game):
             the_file.write(string)
 
 
-class GameState:
-    def __init__(self, to_move, utility, s_pieces, c_pieces, row_values, s_no_move=False, c_no_move=False):
+class GameState(object):
+    # states are kept alive in caches, so they carry no instance dict and keep squares as byte arrays
+    __slots__ = ('to_move', 'utility', 's_squares', 'c_squares', 's_board', 'c_board', 'stacks', 'row_values', 's_no_move', 'c_no_move', 'key')
+
+    def __init__(self, to_move, utility, s_squares, c_squares, s_board, c_board, stacks, row_values, s_no_move=False, c_no_move=False, key=None):
         self.to_move = to_move
         self.utility = utility
-        self.s_pieces = s_pieces
-        self.c_pieces = c_pieces
+        # squares are kept in piece order so that moves come out in the same order as the piece lists did
+        self.s_squares = s_squares
+        self.c_squares = c_squares
+        self.s_board = s_board
+        self.c_board = c_board
+        # number of pieces on squares holding more than one, which only happens on rows 0 and 7,
+        # the dict is shared between copies and replaced rather than changed
+        self.stacks = stacks
         self.row_values = row_values
         self.s_no_move = s_no_move
         self.c_no_move = c_no_move
+        self.key = self.zobrist() if key is None else key
+
+    @staticmethod
+    def from_pieces(to_move, utility, s_pieces, c_pieces, row_values, s_no_move=False, c_no_move=False):
+        squares = {'S': [], 'C': []}
+        boards = {'S': 0, 'C': 0}
+        stacks = dict()
+        for p in s_pieces + c_pieces:
+            sq = p.coor[0] * 8 + p.coor[1]
+            if boards[p.type] & BITS[sq]:
+                stacks[sq] = stacks.get(sq, 1) + 1
+            else:
+                boards[p.type] |= BITS[sq]
+                squares[p.type].append(sq)
+        return GameState(to_move=to_move, utility=utility, s_squares=array('B', squares['S']), c_squares=array('B', squares['C']), s_board=boards['S'], c_board=boards['C'],
+                         stacks=stacks, row_values=row_values, s_no_move=s_no_move, c_no_move=c_no_move)
+
+    @property
+    def s_pieces(self):
+        return [Piece('S', COORS[sq]) for sq in self.s_squares for _ in range(self.stacks.get(sq, 1))]
+
+    @property
+    def c_pieces(self):
+        return [Piece('C', COORS[sq]) for sq in self.c_squares for _ in range(self.stacks.get(sq, 1))]
+
+    def copy(self):
+        return GameState(to_move=self.to_move, utility=self.utility, s_squares=self.s_squares[:], c_squares=self.c_squares[:], s_board=self.s_board, c_board=self.c_board,
+                         stacks=self.stacks, row_values=self.row_values, s_no_move=self.s_no_move, c_no_move=self.c_no_move, key=self.key)
+
+    def apply(self, move_action, square_values):
+        # plays move_action in place and returns a token for undo, square_values are the per-square piece values of the game
+        token = (self.to_move, self.utility, self.key, self.s_no_move, self.c_no_move, self.s_board, self.c_board)
+        if move_action == NOOP:
+            if self.to_move == 'S':
+                if not self.s_no_move:
+                    self.key ^= ZOBRIST_S_NO_MOVE
+                self.s_no_move = True
+            else:
+                if not self.c_no_move:
+                    self.key ^= ZOBRIST_C_NO_MOVE
+                self.c_no_move = True
+            self.key ^= ZOBRIST_C_TO_MOVE
+            self.to_move = self.to_move == 'S' and 'C' or 'S'
+            return token
+        original = move_action[0][0] * 8 + move_action[0][1]
+        destination = move_action[1][0] * 8 + move_action[1][1]
+        eaten = None
+        if original - destination in (14, 18, -14, -18):
+            eaten = (original + destination) // 2
+        stacks = self.stacks
+        # the child never carries a pass flag, and the side to move flips
+        key = self.key
+        if self.s_no_move:
+            key ^= ZOBRIST_S_NO_MOVE
+        if self.c_no_move:
+            key ^= ZOBRIST_C_NO_MOVE
+        if self.s_board & BITS[original]:
+            to_move = 'C'
+            squares, eaten_squares = self.s_squares, self.c_squares
+            mover_values, eaten_values = square_values
+            mover_keys, eaten_keys = ZOBRIST_S, ZOBRIST_C
+            occupied = self.s_board & BITS[destination]
+            self.s_board = self.s_board & ~BITS[original] | BITS[destination]
+            if eaten is not None:
+                self.c_board &= ~BITS[eaten]
+        else:
+            to_move = 'S'
+            squares, eaten_squares = self.c_squares, self.s_squares
+            eaten_values, mover_values = square_values
+            mover_keys, eaten_keys = ZOBRIST_C, ZOBRIST_S
+            occupied = self.c_board & BITS[destination]
+            self.c_board = self.c_board & ~BITS[original] | BITS[destination]
+            if eaten is not None:
+                self.s_board &= ~BITS[eaten]
+        # the moved piece keeps its place in the piece order, unless it joins a stack that already has one
+        index = squares.index(original)
+        if occupied:
+            del squares[index]
+        else:
+            squares[index] = destination
+        eaten_index = None
+        if eaten is not None:
+            eaten_index = eaten_squares.index(eaten)
+            del eaten_squares[eaten_index]
+        # only the moved pieces change rows and only the captured pieces leave the board
+        utility = self.utility + (mover_values[destination] - mover_values[original]) * stacks.get(original, 1)
+        if eaten is not None:
+            utility -= eaten_values[eaten] * stacks.get(eaten, 1)
+            key ^= eaten_keys[eaten]
+        if (self.to_move == 'C') != (to_move == 'C'):
+            key ^= ZOBRIST_C_TO_MOVE
+        key ^= mover_keys[original]
+        if not occupied:
+            key ^= mover_keys[destination]
+        old_stacks = None
+        if occupied or stacks and (original in stacks or eaten in stacks):
+            # the whole stack on the original square moves, and a capture removes the whole stack it jumps over
+            old_stacks = stacks
+            for sq in (original, destination, eaten):
+                if sq in stacks:
+                    key ^= ZOBRIST_STACK[sq] * stacks[sq] & FULL_BOARD
+            stacks = self.stacks = dict(stacks)
+            stacks.pop(eaten, None)
+            count = stacks.pop(original, 1)
+            if occupied:
+                count += stacks.get(destination, 1)
+            if count > 1:
+                stacks[destination] = count
+                key ^= ZOBRIST_STACK[destination] * count & FULL_BOARD
+        self.to_move = to_move
+        self.utility = utility
+        self.key = key
+        self.s_no_move = False
+        self.c_no_move = False
+        return token + (squares, original, index, occupied, eaten_squares, eaten, eaten_index, old_stacks)
+
+    def undo(self, token):
+        self.to_move, self.utility, self.key, self.s_no_move, self.c_no_move, self.s_board, self.c_board = token[:7]
+        if len(token) == 7:
+            return
+        squares, original, index, occupied, eaten_squares, eaten, eaten_index, old_stacks = token[7:]
+        if occupied:
+            squares.insert(index, original)
+        else:
+            squares[index] = original
+        if eaten_index is not None:
+            eaten_squares.insert(eaten_index, eaten)
+        if old_stacks is not None:
+            self.stacks = old_stacks
+
+    def zobrist(self, mirror=False):
+        # with mirror, the key of the position reflected left to right
+        squares = mirror and MIRROR or SQUARES
+        key = 0
+        for sq in self.s_squares:
+            key ^= ZOBRIST_S[squares[sq]]
+        for sq in self.c_squares:
+            key ^= ZOBRIST_C[squares[sq]]
+        for sq, count in self.stacks.items():
+            key ^= ZOBRIST_STACK[squares[sq]] * count & FULL_BOARD
+        if self.to_move == 'C':
+            key ^= ZOBRIST_C_TO_MOVE
+        if self.s_no_move:
+            key ^= ZOBRIST_S_NO_MOVE
+        if self.c_no_move:
+            key ^= ZOBRIST_C_NO_MOVE
+        return key
+
+    def canonical_key(self):
+        # the same key for the position and its mirror image, which moves and values the same way
+        return min(self.key, self.zobrist(mirror=True))
 
     def is_only_one_play(self):
-        return (not self.c_pieces) != (not self.s_pieces)
+        return (not self.c_board) != (not self.s_board)
 
     def moves(self, player):
-        if self.is_only_one_play():
+        s_board = self.s_board
+        c_board = self.c_board
+        if (not c_board) != (not s_board):
             return [NOOP]
         if player == 'S':
-            pieces = self.s_pieces
+            '''
+                 0 0
+                  S
+            '''
+            squares = self.s_squares
+            steps = S_STEPS
+            jumps = S_JUMPS
+            # empty squares, or squares on row 0 that already hold S
+            open_squares = ~(c_board | s_board & NOT_ROW_0)
+            opponent = c_board
         else:
-            pieces = self.c_pieces
+            '''
+                C
+               0 0
+            '''
+            squares = self.c_squares
+            steps = C_STEPS
+            jumps = C_JUMPS
+            open_squares = ~(s_board | c_board & NOT_ROW_7)
+            opponent = s_board
         action_list = []
-        pieces_map = dict()
-        for p in self.s_pieces + self.c_pieces:
-            coor = p.coor
-            piece_list = pieces_map.get(coor)
-            if piece_list is None:
-                pieces_map[coor] = [p]
-            else:
-                piece_list.append(p)
-        for p in pieces:
-            coor = p.coor
-            left_down = Utility.left_down(coor)
-            left_down_down = Utility.left_down_down(coor)
-            right_down = Utility.right_down(coor)
-            right_down_down = Utility.right_down_down(coor)
-            left_up = Utility.left_up(coor)
-            left_up_up = Utility.left_up_up(coor)
-            right_up = Utility.right_up(coor)
-            right_up_up = Utility.right_up_up(coor)
-            if p.type == 'S':
-                '''
-                     0 0
-                      S
-                '''
-                if left_up[0] >= 0 and left_up[1] >= 0 and (pieces_map.get(left_up) is None or (left_up[0] == 0 and pieces_map.get(left_up)[0].type == 'S')):
-                    action_name = (coor, left_up)
-                    action_list.append(action_name)
-                if right_up[0] >= 0 and right_up[1] < 8 and (pieces_map.get(right_up) is None or right_up[0] == 0 and pieces_map.get(right_up)[0].type == 'S'):
-                    action_name = (coor, right_up)
-                    action_list.append(action_name)
-                if left_up[0] >= 0 and left_up[0] >= 0 and left_up_up[0] >= 0 and left_up_up[1] >= 0 and \
-                        pieces_map.get(left_up) is not None and pieces_map.get(left_up)[0].type == 'C' \
-                        and (pieces_map.get(left_up_up) is None or left_up_up[0] == 0 and pieces_map.get(left_up_up)[0].type == 'S'):
-                    action_name = (coor, left_up_up)
-                    action_list.append(action_name)
-                if right_up[0] >= 0 and right_up[1] < 8 and right_up_up[0] >= 0 and right_up_up[1] < 8 and \
-                        pieces_map.get(right_up) is not None and pieces_map.get(right_up)[0].type == 'C' \
-                        and (pieces_map.get(right_up_up) is None or right_up_up[0] == 0 and pieces_map.get(right_up_up)[0].type == 'S'):
-                    action_name = (coor, right_up_up)
-                    action_list.append(action_name)
-            if p.type == 'C':
-                '''
-                    C
-                   0 0
-                '''
-                if left_down[0] < 8 and left_down[1] >= 0 and (pieces_map.get(left_down) is None or left_down[0] == 7 and pieces_map.get(left_down)[0].type == 'C'):
-                    action_name = (coor, left_down)
-                    action_list.append(action_name)
-                if right_down[0] < 8 and right_down[1] < 8 and (pieces_map.get(right_down) is None or right_down[0] == 7 and pieces_map.get(right_down)[0].type == 'C'):
-                    action_name = (coor, right_down)
-                    action_list.append(action_name)
-                if left_down[0] < 8 and left_down[1] >= 0 and left_down_down[0] < 8 and left_down_down[1] >= 0 and \
-                        pieces_map.get(left_down) is not None and pieces_map.get(left_down)[0].type == 'S' and \
-                        (pieces_map.get(left_down_down) is None or left_down_down[0] == 7 and pieces_map.get(left_down_down)[0].type == 'C'):
-                    action_name = (coor, left_down_down)
-                    action_list.append(action_name)
-                if right_down[0] < 8 and right_down[1] < 8 and right_down_down[0] < 8 and right_down_down[1] < 8 and \
-                        pieces_map.get(right_down) is not None and pieces_map.get(right_down)[0].type == 'S' \
-                        and (pieces_map.get(right_down_down) is None or right_down_down[0] == 7 and pieces_map.get(right_down_down)[0].type == 'C'):
-                    action_name = (coor, right_down_down)
-                    action_list.append(action_name)
+        stacks = self.stacks
+        for sq in squares:
+            start = len(action_list)
+            for target, action in steps[sq]:
+                if open_squares & target:
+                    action_list.append(action)
+            for over, target, action in jumps[sq]:
+                if opponent & over and open_squares & target:
+                    action_list.append(action)
+            if stacks and sq in stacks:
+                # every piece of a stack offers the same moves
+                action_list.extend(action_list[start:] * (stacks[sq] - 1))
         if len(action_list) == 0:
             action_list.append(NOOP)
-        # print self.pieces
-        # print player
-        # print action_list
-        # print '--------'
         return action_list
 
+    def generate_moves(self, player):
+        # the moves of moves(player), jumps first, then steps, then NOOP only when there was nothing else,
+        # the state may be changed between moves as long as it is restored before the next one is asked for
+        s_board = self.s_board
+        c_board = self.c_board
+        if (not c_board) != (not s_board):
+            yield NOOP
+            return
+        if player == 'S':
+            squares = self.s_squares
+            steps = S_STEPS
+            jumps = S_JUMPS
+            open_squares = ~(c_board | s_board & NOT_ROW_0)
+            opponent = c_board
+        else:
+            squares = self.c_squares
+            steps = C_STEPS
+            jumps = C_JUMPS
+            open_squares = ~(s_board | c_board & NOT_ROW_7)
+            opponent = s_board
+        stacks = self.stacks
+        found = False
+        for sq in list(squares):
+            for over, target, action in jumps[sq]:
+                if opponent & over and open_squares & target:
+                    found = True
+                    for _ in range(stacks.get(sq, 1)):
+                        yield action
+        for sq in list(squares):
+            for target, action in steps[sq]:
+                if open_squares & target:
+                    found = True
+                    for _ in range(stacks.get(sq, 1)):
+                        yield action
+        if not found:
+            yield NOOP
+
 
 class Piece(namedtuple('piece', ['type', 'coor'])):
-    def __eq__(self, other):
-        return self.type == other.type and self.coor == other.coor
+    __slots__ = ()
 
     def __str__(self):
         return "{}({},{})".format(self.type, self.coor[0], self.coor[1])
@@ -439,12 +1315,49 @@ class Utility:
         return coor[0] - 2, coor[1] + 2
 
 
+def move_tables(steps, jumps):
+    # for every square, the (target bit, action) pairs of the steps and the (over bit, target bit, action)
+    # triples of the jumps that stay on the board, in the order moves lists them
+    step_table = []
+    jump_table = []
+    for coor in COORS:
+        step_moves = []
+        jump_moves = []
+        for step in steps:
+            target = step(coor)
+            if 0 <= target[0] < 8 and 0 <= target[1] < 8:
+                step_moves.append((BITS[target[0] * 8 + target[1]], (coor, target)))
+        for step, jump in zip(steps, jumps):
+            over = step(coor)
+            target = jump(coor)
+            if 0 <= target[0] < 8 and 0 <= target[1] < 8:
+                jump_moves.append((BITS[over[0] * 8 + over[1]], BITS[target[0] * 8 + target[1]], (coor, target)))
+        step_table.append(tuple(step_moves))
+        jump_table.append(tuple(jump_moves))
+    return step_table, jump_table
+
+
+S_STEPS, S_JUMPS = move_tables((Utility.left_up, Utility.right_up), (Utility.left_up_up, Utility.right_up_up))
+C_STEPS, C_JUMPS = move_tables((Utility.left_down, Utility.right_down), (Utility.left_down_down, Utility.right_down_down))
+
+
+def solve(chess, stats=None, table=None, state=None, deadline=None):
+    # table is only used by ALPHABETA, the other engines keep values in another frame, state is the initial state by default,
+    # and past the deadline every engine gives up with SearchTimeout
+    if state is None:
+        state = chess.initial_state
+    if chess.config.algorithm == 'MINIMAX':
+        return minimax_decision(game=chess, state=state, depth_limit=chess.config.depth_limit, stats=stats, deadline=deadline)
+    if chess.config.algorithm in ('PVS', 'NEGASCOUT'):
+        return principal_variation_search(game=chess, state=state, d=chess.config.depth_limit, table=TranspositionTable(), ordering=MoveOrdering(), stats=stats, deadline=deadline)
+    if chess.config.algorithm == 'MTDF':
+        return mtdf_search(game=chess, state=state, d=chess.config.depth_limit, table=TranspositionTable(), ordering=MoveOrdering(), stats=stats, deadline=deadline)
+    return alphabeta_cutoff_search(game=chess, state=state, d=chess.config.depth_limit, stats=stats, table=table, deadline=deadline)
+
+
 def main():
     chess = Chess(path="../res/input5.txt", configuration=None)
-    if chess.config.algorithm == 'MINIMAX':
-        result = minimax_decision(game=chess, state=chess.initial_state, depth_limit=chess.config.depth_limit)
-    else:
-        result = alphabeta_cutoff_search(game=chess, state=chess.initial_state, d=chess.config.depth_limit)
+    result = solve(chess)
     string = chess.translate(result)
     chess.write_to_file(string=string, path="../res/output5_my.txt")
 
@@ -0,0 +1,247 @@
+import ctypes
+import random
+import time
+from multiprocessing import Pool, Process, Queue, RawArray, Value
+
+try:
+    from queue import Empty
+except ImportError:
+    from Queue import Empty
+
+from hw1cs561s2018 import MonteCarloTree, MoveOrdering, SearchStats, TranspositionTable, alphabeta_cutoff_search, infinity, mcts_decision, mcts_search, minimax_decision
+
+# ______________________________________________________________________________
+# Root-parallel search
+# every root move is searched in a pool worker through the root loop of the sequential engine,
+# restricted to that one move, and the results are merged back in generation order
+shared_alpha = None
+
+
+def share_alpha(alpha):
+    global shared_alpha
+    shared_alpha = alpha
+
+
+def search_root_action(task):
+    state, game, algorithm, depth_limit, action, use_alpha = task
+    if algorithm == 'MINIMAX':
+        return minimax_decision(state, game, depth_limit, actions=[action])
+    alpha = -infinity
+    if use_alpha:
+        alpha = shared_alpha.value
+    result = alphabeta_cutoff_search(state, game, d=depth_limit, actions=[action], alpha=alpha)
+    if result[0] is not None:
+        with shared_alpha.get_lock():
+            if result[2] > shared_alpha.value:
+                shared_alpha.value = result[2]
+    return result + (alpha,)
+
+
+def root_parallel_search(state, game, depth_limit=infinity, algorithm='ALPHABETA', processes=None):
+    if game.terminal_test(state) or len(game.actions(state)) < 2:
+        if algorithm == 'MINIMAX':
+            return minimax_decision(state, game, depth_limit)
+        return alphabeta_cutoff_search(state, game, d=depth_limit)
+    actions = game.actions(state)
+    alpha = Value('d', -infinity)
+    pool = Pool(processes, initializer=share_alpha, initargs=(alpha,))
+    try:
+        if algorithm == 'MINIMAX':
+            results = pool.map(search_root_action, [(state, game, algorithm, depth_limit, a, False) for a in actions])
+            return merge_minimax(results)
+        # the first move is searched alone so the others start with a useful alpha
+        share_alpha(alpha)
+        results = [search_root_action((state, game, algorithm, depth_limit, actions[0], False))]
+        results += pool.map(search_root_action, [(state, game, algorithm, depth_limit, a, True) for a in actions[1:]], chunksize=1)
+        best = merge_alphabeta(results)
+        # a move that failed low against an alpha equal to the best value may tie it, and ties go to the earlier move
+        retry = [i for i in range(best) if results[i][0] is None and results[i][4] == results[best][2]]
+        if retry:
+            researched = pool.map(search_root_action, [(state, game, algorithm, depth_limit, actions[i], False) for i in retry])
+            for i, result in zip(retry, researched):
+                results[i] = result[:3] + (results[i][3] + result[3] - 2, -infinity)
+            best = merge_alphabeta(results)
+        nodes = 2 + sum(result[3] - 2 for result in results)
+        return results[best][0], results[best][1], results[best][2], nodes
+    finally:
+        pool.close()
+        pool.join()
+
+
+def merge_minimax(results):
+    # each worker counts its root plus the nodes below its move, the root is counted once
+    best = None
+    for result in results:
+        if best is None or result[2] > best[2]:
+            best = result
+    nodes = 1 + sum(result[3] - 1 for result in results)
+    return best[0], best[1], best[2], nodes
+
+
+def merge_alphabeta(results):
+    # the earliest move with the highest exact value, like the sequential root loop
+    best = None
+    for i, result in enumerate(results):
+        if result[0] is not None and (best is None or result[2] > results[best][2]):
+            best = i
+    return best
+
+
+# ______________________________________________________________________________
+# Lazy SMP
+# several processes search the same root at the same depth with differently shuffled move orders,
+# and share what they find through one transposition table in shared memory
+class SharedTranspositionTable(TranspositionTable):
+    # every slot is two 64-bit words, the key xor the data and the data itself, so a slot torn by two
+    # processes writing at once fails the key check instead of returning a mixed entry
+    def __init__(self, size=1 << 16, words=None):
+        self.size = size
+        self.words = words if words is not None else RawArray(ctypes.c_uint64, 2 * size)
+        self.generation = 0
+
+    def probe(self, key):
+        index = 2 * (key % self.size)
+        data = self.words[index + 1]
+        if data == 0 or self.words[index] ^ data != key:
+            return None
+        return (key, data >> 32 & 0xFF, (data & 0xFFFFFFFF) - (1 << 31), data >> 40 & 0x3, SharedTranspositionTable.unpack_move(data >> 50), data >> 42 & 0xFF)
+
+    def store(self, key, depth, value, bound, move):
+        if not 0 <= depth < 256 or not -(1 << 31) <= value < 1 << 31 or value != int(value):
+            return
+        index = 2 * (key % self.size)
+        data = self.words[index + 1]
+        if data and self.words[index] ^ data != key and data >> 42 & 0xFF == self.generation & 0xFF and depth < data >> 32 & 0xFF:
+            return
+        data = int(value) + (1 << 31) | depth << 32 | bound << 40 | (self.generation & 0xFF) << 42 | SharedTranspositionTable.pack_move(move) << 50
+        self.words[index] = key ^ data
+        self.words[index + 1] = data
+
+
+class ShuffledOrdering(MoveOrdering):
+    def __init__(self, seed):
+        MoveOrdering.__init__(self)
+        self.random = random.Random(seed)
+
+    def order(self, actions, depth):
+        # shuffling first only reorders moves the usual ordering ranks equally
+        actions = list(actions)
+        self.random.shuffle(actions)
+        return MoveOrdering.order(self, actions, depth)
+
+
+class PublishedNodes(dict):
+    # the visited nodes per depth of a worker's SearchStats, which also keeps a running total in the worker's slot
+    # of a shared array, so the count of a worker that is stopped part way is still known
+    def __init__(self, counts, slot):
+        dict.__init__(self)
+        self.counts = counts
+        self.slot = slot
+
+    def __setitem__(self, depth, count):
+        self.counts[self.slot] += count - self.get(depth, 0)
+        dict.__setitem__(self, depth, count)
+
+
+def lazy_smp_worker(worker, state, game, d, size, words, counts, results):
+    # a worker that fails sends its error instead of a result
+    try:
+        table = SharedTranspositionTable(size, words)
+        ordering = MoveOrdering()
+        if worker:
+            ordering = ShuffledOrdering(worker)
+        stats = SearchStats()
+        stats.depth_nodes = PublishedNodes(counts, worker)
+        result = alphabeta_cutoff_search(state, game, d=d, table=table, ordering=ordering, stats=stats)
+    except Exception as e:
+        results.put((worker, None, '{}: {}'.format(e.__class__.__name__, e)))
+        return
+    results.put((worker, result, stats.elapsed))
+
+
+def lazy_smp_search(state, game, d=4, processes=2, table_size=1 << 16, measure_speedup=False):
+    # every worker searches the full tree with the root in generation order, so each of them returns the
+    # sequential decision, the table only lets them skip work another worker has already done, and the
+    # first worker to finish answers for all of them while the others are stopped. Every worker reports the
+    # nodes it visited, only the first one its time
+    report = dict()
+    if measure_speedup:
+        start = time.time()
+        alphabeta_cutoff_search(state, game, d=d, table=TranspositionTable(table_size), ordering=MoveOrdering())
+        report['sequential_time'] = time.time() - start
+    words = RawArray(ctypes.c_uint64, 2 * table_size)
+    counts = RawArray(ctypes.c_uint64, processes)
+    results = Queue()
+    start = time.time()
+    workers = [Process(target=lazy_smp_worker, args=(i, state, game, d, table_size, words, counts, results)) for i in range(processes)]
+    for worker in workers:
+        worker.start()
+    errors = []
+    try:
+        result = None
+        while result is None:
+            try:
+                first, result, detail = results.get(timeout=0.1)
+            except Empty:
+                # a worker that died without sending anything must not leave the search waiting forever
+                if not any(worker.is_alive() for worker in workers) and results.empty():
+                    errors.append('{} workers exited without a result'.format(processes - len(errors)))
+                    raise RuntimeError('lazy SMP search failed: {}'.format('; '.join(errors)))
+                continue
+            if result is None:
+                errors.append('worker {}: {}'.format(first, detail))
+                if len(errors) == processes:
+                    raise RuntimeError('lazy SMP search failed: {}'.format('; '.join(errors)))
+        report['time'] = time.time() - start
+    finally:
+        for worker in workers:
+            worker.terminate()
+        for worker in workers:
+            worker.join()
+    report['worker'] = first
+    report['worker_nodes'] = [int(count) for count in counts]
+    report['worker_times'] = [detail if i == first else None for i in range(processes)]
+    if measure_speedup:
+        report['speedup'] = report['sequential_time'] / report['time']
+    return result, report
+
+
+# ______________________________________________________________________________
+# Root-parallel Monte Carlo tree search
+# every process grows its own tree from a different seed, and the visits and utilities of the root moves are
+# summed over the trees, whose root moves all come in generation order
+def mcts_worker(task):
+    state, game, iterations, deadline, exploration, capture_bias, seed = task
+    tree = MonteCarloTree(state, game, exploration, capture_bias, seed)
+    tree.search(iterations, deadline)
+    return tree.root_children(), tree.depth_nodes
+
+
+def root_parallel_mcts(state, game, iterations=1000, time_limit=None, exploration=1.4, capture_bias=0.8, seed=0, processes=2, stats=None):
+    # the iterations are shared out between the processes, a time limit applies to each of them
+    if stats is None:
+        stats = SearchStats()
+    if game.terminal_test(state):
+        return mcts_search(state, game, iterations, time_limit, exploration, capture_bias, seed, stats)
+    deadline = None
+    if time_limit is not None:
+        deadline = time.time() + time_limit
+    budgets = [None] * processes
+    if iterations is not None:
+        budgets = [iterations // processes + (i < iterations % processes) for i in range(processes)]
+    pool = Pool(processes)
+    try:
+        trees = pool.map(mcts_worker, [(state, game, budgets[i], deadline, exploration, capture_bias, seed + i) for i in range(processes)], chunksize=1)
+    finally:
+        pool.close()
+        pool.join()
+    children = [(moves[0][0], sum(child[1] for child in moves), sum(child[2] for child in moves)) for moves in zip(*[tree[0] for tree in trees])]
+    # each tree counts its own root
+    for tree in trees:
+        for depth, count in tree[1].items():
+            stats.depth_nodes[depth] = stats.depth_nodes.get(depth, 0) + count
+    stats.depth_nodes[0] = 1
+    stats.nodes = stats.visited()
+    stats.leaf_evaluations += sum(child[1] for child in children)
+    stats.stop()
+    return mcts_decision(state, game, children, stats.nodes)
@@ -0,0 +1,88 @@
+import time
+from multiprocessing import Process, Queue
+
+from hw1cs561s2018 import TranspositionTable, alphabeta_cutoff_search
+
+# ______________________________________________________________________________
+# Pondering
+# after its move the player guesses the reply from the principal variation and searches the position it
+# leads to in a background process while the opponent thinks. When the opponent plays the guessed reply
+# the player waits for that search instead of starting its own, any other reply cancels it.
+
+
+def search_and_predict(state, game, depth):
+    # the decision and the reply the search expects, read from the table entry of the position after the move
+    table = TranspositionTable()
+    result = alphabeta_cutoff_search(state, game, d=depth, table=table)
+    reply = None
+    after = game.result(state, result[0])
+    if not game.terminal_test(after):
+        entry = table.probe(after.key)
+        if entry is not None and entry[4] in game.actions(after):
+            reply = entry[4]
+    return result, reply
+
+
+def ponder_worker(state, game, depth, results):
+    start = time.time()
+    result, reply = search_and_predict(state, game, depth)
+    results.put((result, reply, time.time() - start))
+
+
+class PonderingPlayer:
+    def __init__(self, game, depth=4, ponder=True, ponder_depth=None):
+        # game is valued from the side this player moves, the ponder search may go deeper than the normal one
+        # since a hit returns it as the move
+        self.game = game
+        self.depth = depth
+        self.ponder = ponder
+        self.ponder_depth = ponder_depth or depth
+        self.reply = None
+        self.pondering = None
+        self.hits = 0
+        self.misses = 0
+        self.saved = 0.0
+        self.latencies = []
+
+    def __call__(self, game, state):
+        start = time.time()
+        state = self.game.view(state, game)
+        result = None
+        if self.pondering is not None:
+            key, process, results = self.pondering
+            self.pondering = None
+            if key == state.key:
+                result, reply, elapsed = results.get()
+                process.join()
+                self.hits += 1
+                # the pondered search ran for elapsed seconds, of which the player only waited for the rest
+                self.saved += max(0.0, elapsed - (time.time() - start))
+            else:
+                process.terminate()
+                process.join()
+                self.misses += 1
+        if result is None:
+            result, reply = search_and_predict(state, self.game, self.depth)
+        self.latencies.append(time.time() - start)
+        if self.ponder and reply is not None:
+            predicted = self.game.result(self.game.result(state, result[0]), reply)
+            if not self.game.terminal_test(predicted):
+                results = Queue()
+                process = Process(target=ponder_worker, args=(predicted, self.game, self.ponder_depth, results))
+                process.daemon = True
+                process.start()
+                self.pondering = (predicted.key, process, results)
+        return result[0]
+
+    def stop(self):
+        if self.pondering is not None:
+            self.pondering[1].terminate()
+            self.pondering[1].join()
+            self.pondering = None
+
+    def report(self):
+        moves = len(self.latencies)
+        guesses = self.hits + self.misses
+        return {'moves': moves, 'ponder_hits': self.hits, 'ponder_misses': self.misses, 'hit_rate': guesses and float(self.hits) / guesses or 0.0,
+                'saved_time': self.saved, 'saved_per_move': moves and self.saved / moves or 0.0,
+                'latency_per_move': moves and sum(self.latencies) / moves or 0.0}
@@ -0,0 +1,66 @@
+import sqlite3
+
+from hw1cs561s2018 import TranspositionTable
+
+# ______________________________________________________________________________
+# Persistent position cache
+# a transposition table that keeps its entries in an SQLite file, so later runs and other processes start from
+# what earlier ones searched. Values are seen from the player of the input file and depend on its row values,
+# so entries are kept apart per player and row values. The key already covers the side to move and the passes.
+
+
+class PositionCache(TranspositionTable):
+    def __init__(self, path, player, row_values, size=1 << 16, max_entries=1 << 20):
+        # inputs that mirror each other share their entries
+        TranspositionTable.__init__(self, size, symmetric=True)
+        self.context = '{}:{}'.format(player, ','.join(str(value) for value in row_values))
+        self.max_entries = max_entries
+        # entries stored since the last flush, written to the file in one transaction
+        self.pending = dict()
+        self.connection = sqlite3.connect(path, timeout=60)
+        self.connection.execute('CREATE TABLE IF NOT EXISTS positions (key INTEGER, context TEXT, depth INTEGER, value, bound INTEGER, move INTEGER, '
+                                'used INTEGER, PRIMARY KEY (key, context))')
+        self.connection.execute('CREATE INDEX IF NOT EXISTS positions_used ON positions (used)')
+        # every run stamps the entries it writes, the least recently written ones are evicted first
+        self.used = (self.connection.execute('SELECT MAX(used) FROM positions').fetchone()[0] or 0) + 1
+        self.connection.commit()
+
+    @staticmethod
+    def signed(key):
+        # SQLite integers are signed 64-bit
+        return key - (1 << 64) if key >= 1 << 63 else key
+
+    def probe(self, key):
+        entry = TranspositionTable.probe(self, key)
+        if entry is not None:
+            return entry
+        row = self.connection.execute('SELECT depth, value, bound, move FROM positions WHERE key = ? AND context = ?', (PositionCache.signed(key), self.context)).fetchone()
+        if row is None:
+            return None
+        entry = (key, row[0], row[1], row[2], TranspositionTable.unpack_move(row[3]), self.generation)
+        # kept in memory as an entry of an older search, so anything searched now replaces it
+        self.entries[key % self.size] = entry[:5] + (self.generation - 1,)
+        return entry
+
+    def store(self, key, depth, value, bound, move):
+        TranspositionTable.store(self, key, depth, value, bound, move)
+        pending = self.pending.get(key)
+        if pending is None or depth >= pending[0]:
+            self.pending[key] = (depth, value, bound, move)
+
+    def flush(self):
+        rows = [(PositionCache.signed(key), self.context, depth, value, bound, TranspositionTable.pack_move(move), self.used)
+                for key, (depth, value, bound, move) in self.pending.items()]
+        with self.connection:
+            # a deeper entry already in the file is kept
+            self.connection.executemany('INSERT OR IGNORE INTO positions VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+            self.connection.executemany('UPDATE positions SET depth = ?, value = ?, bound = ?, move = ?, used = ? WHERE key = ? AND context = ? AND depth <= ?',
+                                        [row[2:] + row[:2] + (row[2],) for row in rows])
+            count = self.connection.execute('SELECT COUNT(*) FROM positions').fetchone()[0]
+            if count > self.max_entries:
+                self.connection.execute('DELETE FROM positions WHERE rowid IN (SELECT rowid FROM positions ORDER BY used, depth LIMIT ?)', (count - self.max_entries,))
+        self.pending = dict()
+
+    def close(self):
+        self.flush()
+        self.connection.close()
@@ -0,0 +1,255 @@
+import argparse
+import mmap
+import struct
+import sys
+from array import array
+from itertools import combinations
+
+from hw1cs561s2018 import BITS, Chess, GameState, MIRROR, NOT_ROW_0, NOT_ROW_7, SQUARES
+
+# ______________________________________________________________________________
+# Endgame tablebase
+# a piece that reaches its last row can never move or be captured again, so it only adds a constant to every
+# value below it. A position is indexed by its other, active, pieces, the side to move, whether the side not
+# to move has just passed and whether either side has pieces on its last row. The table stores the exact value
+# of the game played to the end, seen from S and without the constant of the pieces already home.
+MAGIC = b'TB01'
+HEADER = struct.Struct('<4sBc8i')
+MISSING = {'h': -(1 << 15), 'i': -(1 << 31)}
+# active S pieces live on the dark squares of rows 1 to 7 and active C pieces on those of rows 0 to 6
+S_SQUARES = [sq for sq in range(8, 64) if (sq // 8 + sq % 8) % 2 == 1]
+C_SQUARES = [sq for sq in range(0, 56) if (sq // 8 + sq % 8) % 2 == 1]
+S_INDEX = dict((sq, i) for i, sq in enumerate(S_SQUARES))
+C_INDEX = dict((sq, i) for i, sq in enumerate(C_SQUARES))
+S_HOME = [sq for sq in range(0, 8) if sq % 2 == 1]
+C_HOME = [sq for sq in range(56, 64) if sq % 2 == 0]
+
+
+def binomial(n, k):
+    if k < 0 or k > n:
+        return 0
+    result = 1
+    for i in range(k):
+        result = result * (n - i) // (i + 1)
+    return result
+
+
+BINOMIALS = [[binomial(n, k) for k in range(n + 2)] for n in range(max(len(S_SQUARES), len(C_SQUARES)) + 1)]
+
+
+def rank(indexes):
+    # colexicographic rank of a sorted combination
+    return sum(BINOMIALS[index][i + 1] for i, index in enumerate(indexes))
+
+
+def blocks(pieces):
+    # the first entry of every (S count, C count) block of positions with at most pieces active pieces
+    offsets = dict()
+    offset = 0
+    for total in range(pieces + 1):
+        for s_count in range(total + 1):
+            offsets[s_count, total - s_count] = offset
+            offset += binomial(len(S_SQUARES), s_count) * binomial(len(C_SQUARES), total - s_count) * 16
+    return offsets, offset
+
+
+def popcount(board):
+    return bin(board).count('1')
+
+
+class Tablebase:
+    def __init__(self, pieces, row_values, values, typecode='i'):
+        self.pieces = pieces
+        self.row_values = list(row_values)
+        self.values = values
+        self.missing = MISSING[typecode]
+        self.offsets, self.size = blocks(pieces)
+        self.file = None
+
+    @staticmethod
+    def load(path):
+        # the entries are read from the mapped file as they are probed, so opening a large table costs nothing
+        f = open(path, 'rb')
+        values = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        header = HEADER.unpack_from(values, 0)
+        magic, pieces, typecode = header[:3]
+        if magic != MAGIC:
+            raise ValueError('{} is not a tablebase'.format(path))
+        typecode = typecode.decode('ascii')
+        tablebase = Tablebase(pieces, header[3:], MappedValues(values, typecode), typecode)
+        tablebase.file = f
+        return tablebase
+
+    def close(self):
+        if self.file is not None:
+            self.values.close()
+            self.file.close()
+            self.file = None
+
+    def save(self, path):
+        typecode = self.values.typecode
+        with open(path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, self.pieces, typecode.encode('ascii'), *self.row_values))
+            values = array(typecode, self.values)
+            if sys.byteorder != 'little':
+                values.byteswap()
+            f.write(values.tostring() if sys.version_info[0] < 3 else values.tobytes())
+
+    def index(self, state):
+        # entry of the state and the value of its pieces already home, None when the table does not cover it,
+        # a position on the light squares is found as its mirror image on the dark ones
+        s_board = state.s_board
+        c_board = state.c_board
+        if popcount(s_board & NOT_ROW_0) + popcount(c_board & NOT_ROW_7) > self.pieces or state.row_values != self.row_values:
+            return None
+        if state.to_move == 'S':
+            own_pass, passed = state.s_no_move, state.c_no_move
+        else:
+            own_pass, passed = state.c_no_move, state.s_no_move
+        if own_pass:
+            return None
+        pieces = self.pieces_at(state, SQUARES) or self.pieces_at(state, MIRROR)
+        if pieces is None:
+            return None
+        s_indexes, c_indexes, s_home, c_home = pieces
+        entry = self.offsets[len(s_indexes), len(c_indexes)] + (rank(s_indexes) * BINOMIALS[len(C_SQUARES)][len(c_indexes)] + rank(c_indexes)) * 16
+        entry += (state.to_move == 'C') * 8 + passed * 4 + (s_home > 0) * 2 + (c_home > 0)
+        return entry, (s_home - c_home) * self.row_values[7]
+
+    @staticmethod
+    def pieces_at(state, squares):
+        # sorted indexes of the active pieces and counts of the pieces home, with every square mapped through squares
+        s_indexes = []
+        s_home = 0
+        for sq in state.s_squares:
+            if sq < 8:
+                s_home += state.stacks.get(sq, 1)
+            elif squares[sq] in S_INDEX and sq not in state.stacks:
+                s_indexes.append(S_INDEX[squares[sq]])
+            else:
+                return None
+        c_indexes = []
+        c_home = 0
+        for sq in state.c_squares:
+            if sq >= 56:
+                c_home += state.stacks.get(sq, 1)
+            elif squares[sq] in C_INDEX and sq not in state.stacks:
+                c_indexes.append(C_INDEX[squares[sq]])
+            else:
+                return None
+        s_indexes.sort()
+        c_indexes.sort()
+        return s_indexes, c_indexes, s_home, c_home
+
+    def probe(self, state, player):
+        # exact value of the state seen from player, or None
+        index = self.index(state)
+        if index is None:
+            return None
+        value = self.values[index[0]]
+        if value == self.missing:
+            return None
+        value += index[1]
+        return player == 'S' and value or -value
+
+
+class MappedValues:
+    def __init__(self, values, typecode):
+        self.mapped = values
+        self.typecode = typecode
+        self.entry = struct.Struct('<' + typecode)
+
+    def __getitem__(self, index):
+        return self.entry.unpack_from(self.mapped, HEADER.size + index * self.entry.size)[0]
+
+    def __len__(self):
+        return (len(self.mapped) - HEADER.size) // self.entry.size
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def close(self):
+        self.mapped.close()
+
+
+def position(s_squares, c_squares, flags, square_values, row_values):
+    # a state with the given active pieces, and one piece home on the first free square of its last row for each home flag
+    s_squares = list(s_squares)
+    c_squares = list(c_squares)
+    if flags & 2:
+        home = [sq for sq in S_HOME if sq not in c_squares]
+        if not home:
+            return None
+        s_squares.append(home[0])
+    if flags & 1:
+        home = [sq for sq in C_HOME if sq not in s_squares]
+        if not home:
+            return None
+        c_squares.append(home[0])
+    utility = sum(square_values[0][sq] for sq in s_squares) + sum(square_values[1][sq] for sq in c_squares)
+    to_move = flags & 8 and 'C' or 'S'
+    passed = flags & 4 > 0
+    return GameState(to_move=to_move, utility=utility, s_squares=array('B', s_squares), c_squares=array('B', c_squares), s_board=sum(BITS[sq] for sq in s_squares),
+                     c_board=sum(BITS[sq] for sq in c_squares), stacks=dict(), row_values=row_values, s_no_move=to_move == 'C' and passed,
+                     c_no_move=to_move == 'S' and passed)
+
+
+def generate_tablebase(row_values, pieces=3):
+    # every entry is solved by backward induction over the game graph, which has no cycles since pieces only move
+    # forward, each position is solved once its successors are and the solved values are reused through the table
+    row_values = list(row_values)
+    # every active piece ends the game home, captured or where it stands, so the values are bounded by
+    # pieces times the largest row value and most tables fit in two bytes an entry
+    typecode = 'h'
+    if pieces * max(abs(value) for value in row_values) >= (1 << 15) - 1:
+        typecode = 'i'
+    offsets, size = blocks(pieces)
+    tablebase = Tablebase(pieces, row_values, array(typecode, [MISSING[typecode]]) * size, typecode)
+    square_values = Chess.square_values('S', row_values)
+
+    def solve(state):
+        index = tablebase.index(state)
+        if index is not None and tablebase.values[index[0]] != tablebase.missing:
+            return tablebase.values[index[0]] + index[1]
+        if state.is_only_one_play() or state.s_no_move and state.c_no_move:
+            value = state.utility
+        else:
+            values = []
+            for move in state.moves(state.to_move):
+                token = state.apply(move, square_values)
+                values.append(solve(state))
+                state.undo(token)
+            if state.to_move == 'S':
+                value = max(values)
+            else:
+                value = min(values)
+        if index is not None:
+            tablebase.values[index[0]] = value - index[1]
+        return value
+
+    for s_count, c_count in sorted(offsets):
+        for s_squares in combinations(S_SQUARES, s_count):
+            for c_squares in combinations(C_SQUARES, c_count):
+                if set(s_squares) & set(c_squares):
+                    continue
+                for flags in range(16):
+                    state = position(s_squares, c_squares, flags, square_values, row_values)
+                    if state is not None:
+                        solve(state)
+    return tablebase
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Solve every position with a few active pieces and write them to a tablebase file.')
+    parser.add_argument('row_values', help='the eight row values of the input files, comma separated')
+    parser.add_argument('output', help='tablebase file')
+    parser.add_argument('--pieces', type=int, default=3, help='largest number of pieces not yet on their last row')
+    args = parser.parse_args(argv)
+    tablebase = generate_tablebase([int(value) for value in args.row_values.split(',')], args.pieces)
+    tablebase.save(args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,9 @@
+import time
 from unittest import TestCase
 
-from hw1cs561s2018 import Chess, Configuration, alphabeta_cutoff_search
+from hw1cs561s2018 import (Chess, Configuration, EXACT, LOWER, MonteCarloTree, MoveOrdering, SearchStats, SearchTimeout, TranspositionTable,
+                           alphabeta_cutoff_search, aspiration_search, iterative_deepening_search, mcts_decision, mcts_search, minimax_decision, mtdf_search,
+                           principal_variation_search, solve)
 
 
 class TestAlphabeta_search(TestCase):
@@ -72,3 +75,295 @@ S1,0,S1,0,S1,0,S1,0
         # self.assertEqual(368, utility1[1])  # myopic
         # self.assertEqual(368, utility1[2])
         # self.assertEqual(3, utility1[3])
+
+    def test_transposition_table(self):
+        configuration1 = Configuration(path=None)
+        configuration1.generate_configuration_from_string(
+            """Circle
+ALPHABETA
+6
+0,0,0,0,0,0,0,0
+0,0,0,0,0,0,0,0
+0,0,0,0,0,0,0,0
+0,0,0,0,C1,0,0,0
+0,0,0,0,0,0,0,0
+S1,0,S1,0,S1,0,S1,0
+0,0,0,0,0,0,0,0
+0,0,0,0,0,0,0,0
+10,20,30,40,50,200,250,300
+            """)
+        chess1 = Chess(path=None, configuration=configuration1)
+        utility1 = alphabeta_cutoff_search(chess1.initial_state, chess1, configuration1.depth_limit)
+        chess2 = Chess(path=None, configuration=configuration1, verify=True)
+        utility2 = alphabeta_cutoff_search(chess2.initial_state, chess2, configuration1.depth_limit, table=TranspositionTable())
+        self.assertEqual(utility1[:3], utility2[:3])
+        self.assertGreater(utility1[3], utility2[3])
+
+    def test_transposition_table_replacement(self):
+        table = TranspositionTable(size=4)
+        table.store(1, 3, 10, EXACT, None)
+        table.store(5, 2, 20, LOWER, None)
+        self.assertEqual((1, 3, 10, EXACT, None, 0), table.probe(1))
+        self.assertIsNone(table.probe(5))
+        table.new_search()
+        table.store(5, 2, 20, LOWER, None)
+        self.assertIsNone(table.probe(1))
+        self.assertEqual(20, table.probe(5)[2])
+        self.assertEqual(4, len(table.entries))
+
+    def test_table_lookup(self):
+        chess1 = Chess(path="../res/input3.txt", configuration=None)
+        state = chess1.initial_state
+        actions = chess1.actions(state)
+        table = TranspositionTable()
+        stats = SearchStats()
+        self.assertEqual((state.key, None, actions), table.lookup(state, 2, -10, 10, actions, stats))
+        # a value at or above beta is a lower bound, it settles any window it reaches
+        table.record(state.key, state, 2, 10, -10, 10, actions[-1])
+        self.assertEqual(LOWER, table.probe(state.key)[3])
+        self.assertEqual((state.key, 10, actions), table.lookup(state, 2, -10, 10, actions, stats))
+        key, value, ordered = table.lookup(state, 2, -10, 20, actions, stats)
+        self.assertIsNone(value)
+        self.assertEqual(actions[-1], ordered[0])
+        self.assertIsNone(table.lookup(state, 3, -10, 10, actions, stats)[1])
+        table.record(state.key, state, 2, 0, -10, 10, None)
+        self.assertEqual(EXACT, table.probe(state.key)[3])
+        self.assertEqual((3, 1), (stats.table_hits, stats.table_cutoffs))
+
+    def test_symmetric_table(self):
+        chess1 = Chess(path="../res/input3.txt", configuration=None)
+        state = chess1.initial_state
+        mirror = state.zobrist(mirror=True)
+        self.assertEqual(min(state.key, mirror), state.canonical_key())
+        table = TranspositionTable(symmetric=True)
+        self.assertEqual(state.canonical_key(), table.key(state))
+        self.assertEqual(state.key, TranspositionTable().key(state))
+        move = ((1, 0), (0, 1))
+        self.assertEqual(move, table.oriented(move, state.key, state))
+        self.assertEqual(((1, 7), (0, 6)), table.oriented(move, mirror, state))
+        self.assertEqual('Noop', table.oriented('Noop', mirror, state))
+        utility1 = alphabeta_cutoff_search(state, chess1, 9)
+        self.assertEqual(utility1[:3], alphabeta_cutoff_search(state, chess1, 9, table=table, ordering=MoveOrdering())[:3])
+
+    def test_iterative_deepening(self):
+        configuration1 = Configuration(path=None)
+        configuration1.generate_configuration_from_string(
+            """Circle
+ALPHABETA
+6
+0,0,0,0,0,0,0,0
+0,0,0,0,0,0,0,0
+0,0,0,0,0,0,0,0
+0,0,0,0,C1,0,0,0
+0,0,0,0,0,0,0,0
+S1,0,S1,0,S1,0,S1,0
+0,0,0,0,0,0,0,0
+0,0,0,0,0,0,0,0
+10,20,30,40,50,200,250,300
+            """)
+        chess1 = Chess(path=None, configuration=configuration1)
+        utility1 = alphabeta_cutoff_search(chess1.initial_state, chess1, configuration1.depth_limit)
+        utility2 = iterative_deepening_search(chess1.initial_state, chess1, configuration1.depth_limit)
+        self.assertEqual(utility1[:3], utility2[:3])
+        self.assertEqual(6, utility2[4])
+        utility3 = iterative_deepening_search(chess1.initial_state, chess1, 1024, time_limit=0)
+        self.assertEqual(1, utility3[4])
+        self.assertEqual(alphabeta_cutoff_search(chess1.initial_state, chess1, 1), utility3[:4])
+
+    def test_iterative_deepening_whole_game(self):
+        chess1 = Chess(path="../res/input3.txt", configuration=None)
+        utility1 = minimax_decision(chess1.initial_state, chess1)
+        utility2 = iterative_deepening_search(chess1.initial_state, chess1)
+        self.assertEqual(utility1[:3], utility2[:3])
+        self.assertEqual(chess1.max_plies(chess1.initial_state), utility2[4])
+
+    def test_move_ordering(self):
+        ordering = MoveOrdering()
+        actions = [((5, 0), (4, 1)), ((5, 2), (4, 1)), ((5, 2), (4, 3)), ((5, 4), (3, 2))]
+        self.assertEqual([((5, 4), (3, 2))] + actions[:3], ordering.order(actions, 2))
+        ordering.cutoff(((5, 2), (4, 3)), 2, 3)
+        ordering.cutoff(((5, 4), (3, 2)), 2, 3)
+        self.assertEqual([((5, 4), (3, 2)), ((5, 2), (4, 3)), ((5, 0), (4, 1)), ((5, 2), (4, 1))], ordering.order(actions, 2))
+        self.assertEqual([((5, 4), (3, 2)), ((5, 2), (4, 3)), ((5, 0), (4, 1)), ((5, 2), (4, 1))], ordering.order(actions, 4))
+        self.assertEqual({((5, 2), (4, 3)): 9}, ordering.history)
+
+        configuration1 = Configuration(path=None)
+        configuration1.generate_configuration_from_string(
+            """Star
+ALPHABETA
+5
+0,0,0,0,0,0,0,0
+0,0,C1,0,0,0,C1,0
+0,0,0,0,0,0,0,0
+0,0,C1,0,C1,0,0,0
+0,S1,0,0,0,S1,0,0
+0,0,S1,0,0,0,0,0
+0,0,0,0,0,0,S1,0
+0,0,0,0,0,0,0,0
+10,20,30,40,50,60,70,80
+            """)
+        chess1 = Chess(path=None, configuration=configuration1)
+        utility1 = alphabeta_cutoff_search(chess1.initial_state, chess1, configuration1.depth_limit)
+        utility2 = alphabeta_cutoff_search(chess1.initial_state, chess1, configuration1.depth_limit, ordering=MoveOrdering())
+        self.assertEqual(utility1[:3], utility2[:3])
+        self.assertGreater(utility1[3], utility2[3])
+
+    def test_search_stats(self):
+        configuration1 = Configuration(path=None)
+        configuration1.generate_configuration_from_string(
+            """Star
+MINIMAX
+4
+0,C1,0,C1,0,C1,0,C1
+C1,0,C1,0,C1,0,C1,0
+0,C1,0,C1,0,C1,0,C1
+0,0,0,0,0,0,0,0
+0,0,0,0,0,0,0,0
+S1,0,S1,0,S1,0,S1,0
+0,S1,0,S1,0,S1,0,S1
+S1,0,S1,0,S1,0,S1,0
+10,20,30,40,50,60,70,80
+            """)
+        chess1 = Chess(path=None, configuration=configuration1)
+        stats1 = SearchStats()
+        utility1 = minimax_decision(chess1.initial_state, chess1, 4, stats=stats1)
+        self.assertEqual(utility1[3], stats1.nodes)
+        self.assertEqual(stats1.nodes, stats1.visited())
+        self.assertEqual(1, stats1.depth_nodes[0])
+        self.assertEqual(stats1.depth_nodes[4], stats1.leaf_evaluations)
+        self.assertEqual(0, stats1.cutoffs)
+
+        stats2 = SearchStats()
+        utility2 = alphabeta_cutoff_search(chess1.initial_state, chess1, 4, table=TranspositionTable(), ordering=MoveOrdering(), stats=stats2)
+        self.assertEqual(utility1[:3], utility2[:3])
+        self.assertEqual(utility2[3], stats2.nodes)
+        self.assertLess(stats2.visited(), stats1.visited())
+        self.assertGreater(stats2.cutoffs, 0)
+        self.assertTrue(0 < stats2.first_move_cutoff_rate() <= 1)
+        report = stats2.report()
+        self.assertEqual(stats2.visited(), sum(report['depth_nodes']))
+        self.assertEqual(5, len(report['depth_nodes']))
+
+    def test_principal_variation_search(self):
+        configuration1 = Configuration(path=None)
+        configuration1.generate_configuration_from_string(
+            """Star
+PVS
+7
+0,C1,0,C1,0,C1,0,C1
+C1,0,C1,0,C1,0,C1,0
+0,C1,0,C1,0,C1,0,C1
+0,0,0,0,0,0,0,0
+0,0,0,0,0,0,0,0
+S1,0,S1,0,S1,0,S1,0
+0,S1,0,S1,0,S1,0,S1
+S1,0,S1,0,S1,0,S1,0
+10,20,30,40,50,60,70,80
+            """)
+        chess1 = Chess(path=None, configuration=configuration1)
+        stats1 = SearchStats()
+        utility1 = alphabeta_cutoff_search(chess1.initial_state, chess1, configuration1.depth_limit, ordering=MoveOrdering(), stats=stats1)
+        stats2 = SearchStats()
+        utility2 = solve(chess1, stats=stats2)
+        self.assertEqual(utility1[:3], utility2[:3])
+        self.assertEqual(stats2.visited(), utility2[3])
+        self.assertLess(stats2.visited(), stats1.visited())
+
+        for i in range(1, 6):
+            chess2 = Chess(path="../res/input{}.txt".format(i), configuration=None)
+            utility3 = alphabeta_cutoff_search(chess2.initial_state, chess2, chess2.config.depth_limit)
+            utility4 = principal_variation_search(chess2.initial_state, chess2, chess2.config.depth_limit)
+            self.assertEqual(utility3[:3], utility4[:3])
+
+    def test_mtdf_search(self):
+        chess1 = Chess(path="../res/input4.txt", configuration=None)
+        utility1 = alphabeta_cutoff_search(chess1.initial_state, chess1, 6)
+        stats1 = SearchStats()
+        utility2 = mtdf_search(chess1.initial_state, chess1, 6, guess=utility1[2], stats=stats1)
+        stats2 = SearchStats()
+        utility3 = mtdf_search(chess1.initial_state, chess1, 6, guess=utility1[2] + 1000, ordering=MoveOrdering(), stats=stats2)
+        self.assertEqual(utility1[:3], utility2[:3])
+        self.assertEqual(utility1[:3], utility3[:3])
+        self.assertEqual(2, stats1.passes)
+        self.assertGreaterEqual(stats2.passes, stats1.passes)
+
+        for i in range(1, 6):
+            chess2 = Chess(path="../res/input{}.txt".format(i), configuration=None)
+            chess2.config.algorithm = 'MTDF'
+            self.assertEqual(alphabeta_cutoff_search(chess2.initial_state, chess2, chess2.config.depth_limit)[:3], solve(chess2)[:3])
+
+    def test_mtdf_timeout(self):
+        # a search that runs out of time leaves the root state as it was
+        configuration1 = Configuration(path=None)
+        configuration1.generate_configuration_from_string(
+            """Star
+MTDF
+12
+0,C1,0,C1,0,C1,0,C1
+C1,0,C1,0,C1,0,C1,0
+0,C1,0,C1,0,C1,0,C1
+0,0,0,0,0,0,0,0
+0,0,0,0,0,0,0,0
+S1,0,S1,0,S1,0,S1,0
+0,S1,0,S1,0,S1,0,S1
+S1,0,S1,0,S1,0,S1,0
+10,20,30,40,50,60,70,80
+            """)
+        chess1 = Chess(path=None, configuration=configuration1)
+        state = chess1.initial_state
+        before = (state.to_move, state.key, state.s_board, state.c_board, dict(state.stacks))
+        self.assertRaises(SearchTimeout, mtdf_search, state, chess1, 12, deadline=time.time() + 0.05)
+        self.assertEqual(before, (state.to_move, state.key, state.s_board, state.c_board, dict(state.stacks)))
+
+    def test_aspiration_search(self):
+        chess1 = Chess(path="../res/input4.txt", configuration=None)
+        utility1 = alphabeta_cutoff_search(chess1.initial_state, chess1, 6)
+        utility2 = alphabeta_cutoff_search(chess1.initial_state, chess1, 6, alpha=utility1[2])
+        self.assertIsNone(utility2[0])
+        utility3 = alphabeta_cutoff_search(chess1.initial_state, chess1, 6, beta=utility1[2] - 100)
+        self.assertGreaterEqual(utility3[2], utility1[2] - 100)
+
+        stats1 = SearchStats()
+        self.assertEqual(utility1, aspiration_search(chess1.initial_state, chess1, 6, estimate=utility1[2] + 500, window=10, growth=2, stats=stats1))
+        self.assertEqual((6, 0), (stats1.fail_lows, stats1.fail_highs))
+        stats2 = SearchStats()
+        self.assertEqual(utility1[:3], aspiration_search(chess1.initial_state, chess1, 6, estimate=utility1[2] - 500, window=10, growth=2, stats=stats2)[:3])
+        self.assertEqual((0, 6), (stats2.fail_lows, stats2.fail_highs))
+        # after two failed windows the full window is searched
+        stats3 = SearchStats()
+        self.assertEqual(utility1, aspiration_search(chess1.initial_state, chess1, 6, estimate=utility1[2] + 500, window=10, growth=2, stats=stats3, max_re_searches=2))
+        self.assertEqual((2, 0), (stats3.fail_lows, stats3.fail_highs))
+        self.assertRaises(ValueError, aspiration_search, chess1.initial_state, chess1, 6, window=0)
+        self.assertRaises(ValueError, aspiration_search, chess1.initial_state, chess1, 6, growth=1)
+        self.assertRaises(ValueError, iterative_deepening_search, chess1.initial_state, chess1, 6, window=0)
+
+        utility4 = iterative_deepening_search(chess1.initial_state, chess1, 6)
+        self.assertEqual(utility4[:3], iterative_deepening_search(chess1.initial_state, chess1, 6, window=1, growth=2)[:3])
+
+    def test_mcts_search(self):
+        chess1 = Chess(path="../res/input1.txt", configuration=None)
+        stats = SearchStats()
+        utility1 = mcts_search(chess1.initial_state, chess1, iterations=500, stats=stats)
+        self.assertEqual(alphabeta_cutoff_search(chess1.initial_state, chess1, 2)[:3], utility1[:3])
+        self.assertEqual(utility1, mcts_search(chess1.initial_state, chess1, iterations=500))
+        self.assertEqual(500, stats.leaf_evaluations)
+        self.assertEqual(utility1[3], stats.visited())
+        with open('../res/output1.txt') as f:
+            self.assertEqual(f.read().splitlines()[:3], chess1.translate(utility1).splitlines()[:3])
+
+        tree = MonteCarloTree(chess1.initial_state, chess1, seed=1)
+        self.assertEqual(50, tree.search(iterations=50))
+        self.assertEqual(50, tree.visits[0])
+        self.assertEqual(len(tree.moves), sum(tree.depth_nodes.values()))
+        self.assertEqual(50, sum(child[1] for child in tree.root_children()))
+        self.assertEqual(chess1.initial_state.key, tree.state.key)
+
+        utility2 = mcts_search(chess1.initial_state, chess1, iterations=None, time_limit=0.05)
+        self.assertIn(utility2[0], chess1.actions(chess1.initial_state))
+        chess2 = Chess(path="../res/input5.txt", configuration=None)
+        self.assertEqual(('Noop', 368, 368, 3), mcts_search(chess2.initial_state, chess2, iterations=10))
+
+        # playouts that average to 0 value the move at 0, not at its myopic utility
+        chess3 = Chess(path="../res/input3.txt", configuration=None)
+        move = chess3.actions(chess3.initial_state)[0]
+        self.assertEqual(0, mcts_decision(chess3.initial_state, chess3, [(move, 10, 0.0)], 5)[2])
@@ -0,0 +1,48 @@
+from unittest import TestCase, skipIf
+
+from batch_evaluation import BatchEvaluator, numpy
+from hw1cs561s2018 import Chess, Configuration, SearchStats, alphabeta_cutoff_search
+
+
+class TestBatchEvaluation(TestCase):
+    def test_evaluate_states(self):
+        for i in range(1, 6):
+            chess1 = Chess(path="../res/input{}.txt".format(i), configuration=None)
+            evaluator = BatchEvaluator(chess1.config.player, chess1.config.row_values)
+            states = [chess1.result(chess1.initial_state, a) for a in chess1.actions(chess1.initial_state)] + [chess1.initial_state]
+            self.assertEqual([state.utility for state in states], evaluator.evaluate_states(states))
+
+    def test_search(self):
+        configuration1 = Configuration(path=None)
+        configuration1.generate_configuration_from_string(
+            """Circle
+ALPHABETA
+4
+0,C1,0,C1,0,C1,0,C1
+C1,0,C1,0,C1,0,C1,0
+0,C1,0,C1,0,C1,0,C1
+0,0,0,0,0,0,0,0
+0,0,0,0,0,0,0,0
+S1,0,S1,0,S1,0,S1,0
+0,S1,0,S1,0,S1,0,S1
+S1,0,S1,0,S1,0,S1,0
+10,20,30,40,50,60,70,80
+            """)
+        chess1 = Chess(path=None, configuration=configuration1)
+        for d in range(1, 5):
+            stats1 = SearchStats()
+            stats2 = SearchStats()
+            utility1 = alphabeta_cutoff_search(chess1.initial_state, chess1, d, stats=stats1)
+            utility2 = alphabeta_cutoff_search(chess1.initial_state, chess1, d, stats=stats2, batch=BatchEvaluator(chess1.config.player, chess1.config.row_values))
+            self.assertEqual(utility1, utility2)
+            self.assertEqual(stats1.depth_nodes, stats2.depth_nodes)
+
+    @skipIf(numpy is None, 'numpy is not installed')
+    def test_numpy_boards(self):
+        evaluator = BatchEvaluator('S', [10, 20, 30, 40, 50, 60, 70, 80])
+        boards = numpy.zeros((3, 2, 8), dtype=numpy.int64)
+        boards[0, 0, 0] = 2
+        boards[1, 1, 0] = 1
+        boards[2, 0, 7] = 1
+        boards[2, 1, 7] = 1
+        self.assertEqual([160, -10, -70], evaluator.evaluate(boards))
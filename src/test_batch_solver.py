@@ -0,0 +1,65 @@
+import json
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from batch_solver import input_files, main, output_file
+
+
+class TestBatchSolver(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_input_files(self):
+        self.assertEqual(['../res/input1.txt', '../res/input2.txt', '../res/input3.txt', '../res/input4.txt', '../res/input5.txt'], input_files(['../res']))
+        self.assertEqual(['../res/test_case_1.txt', '../res/test_case_2.txt', '../res/input1.txt'], input_files(['../res/test_case_*.txt', '../res/input1.txt']))
+        self.assertEqual(os.path.join('out', 'output3.txt'), output_file('../res/input3.txt', 'out'))
+        self.assertEqual(os.path.join('out', 'output_test_case_1.txt'), output_file('../res/test_case_1.txt', 'out'))
+
+    def test_solve_directory(self):
+        summary_path = os.path.join(self.directory, 'summary.jsonl')
+        output_dir = os.path.join(self.directory, 'output')
+        self.assertEqual(0, main(['../res', '--output-dir', output_dir, '--processes', '2', '--summary', summary_path]))
+        with open(summary_path) as f:
+            summaries = [json.loads(line) for line in f]
+        self.assertEqual(5, len(summaries))
+        for summary in summaries:
+            with open(summary['output']) as f:
+                output = f.read()
+            with open(summary['input'].replace('input', 'output')) as f:
+                self.assertEqual(f.read().strip(), output.strip())
+            self.assertEqual(output.splitlines()[3], str(summary['nodes']))
+
+    def test_error(self):
+        summary_path = os.path.join(self.directory, 'summary.jsonl')
+        self.assertEqual(1, main([os.path.join(self.directory, 'missing.txt'), '--output-dir', self.directory, '--summary', summary_path]))
+        with open(summary_path) as f:
+            self.assertIn('missing.txt', json.loads(f.readline())['error'])
+
+    def test_output_collision(self):
+        # two inputs with the same name in different directories would write the same output file
+        other = os.path.join(self.directory, 'other')
+        os.makedirs(other)
+        shutil.copy('../res/input1.txt', other)
+        summary_path = os.path.join(self.directory, 'summary.jsonl')
+        output_dir = os.path.join(self.directory, 'output')
+        self.assertEqual(1, main(['../res/input1.txt', os.path.join(other, 'input1.txt'), '--output-dir', output_dir, '--processes', '1', '--summary', summary_path]))
+        with open(summary_path) as f:
+            summaries = dict((summary['input'], summary) for summary in map(json.loads, f))
+        self.assertEqual(os.path.join(output_dir, 'output1.txt'), summaries['../res/input1.txt']['output'])
+        self.assertIn('../res/input1.txt', summaries[os.path.join(other, 'input1.txt')]['error'])
+
+    def test_cache(self):
+        cache = os.path.join(self.directory, 'cache.sqlite')
+        for run in range(2):
+            summary_path = os.path.join(self.directory, 'summary{}.jsonl'.format(run))
+            self.assertEqual(0, main(['../res', '--output-dir', self.directory, '--processes', '1', '--cache', cache, '--summary', summary_path]))
+            with open(summary_path) as f:
+                summaries = [json.loads(line) for line in f]
+            for summary in summaries:
+                with open(summary['input'].replace('input', 'output')) as f:
+                    self.assertEqual(f.read().splitlines()[:3], [summary['move'], str(summary['myopic']), str(summary['farsighted'])])
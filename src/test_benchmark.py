@@ -0,0 +1,47 @@
+import sys
+from unittest import TestCase
+
+from benchmark import benchmark_positions, compare, deep_size, generated_board, memory_benchmark, peak_memory, run_benchmark
+from hw1cs561s2018 import Chess, Piece
+
+
+class TestBenchmark(TestCase):
+    def test_memory_benchmark(self):
+        chess = Chess(path='../res/input1.txt', configuration=None)
+        report = memory_benchmark(chess.initial_state, chess, 3)
+        self.assertEqual(9, report['states'])
+        self.assertTrue(0 < report['bytes_per_state'] < 1000)
+        self.assertFalse(hasattr(chess.initial_state, '__dict__'))
+        self.assertEqual((), Piece.__slots__)
+
+    def test_deep_size(self):
+        shared = [1.5]
+        pair = [shared, shared]
+        self.assertEqual(sys.getsizeof(pair), deep_size([pair], shared=[shared]))
+        self.assertEqual(sys.getsizeof(pair) + sys.getsizeof(shared) + sys.getsizeof(1.5), deep_size([pair]))
+
+    def test_peak_memory(self):
+        # every run is measured in its own process, so a peak the benchmark reached before does not show up in it
+        chess = Chess(path='../res/input1.txt', configuration=None)
+        large = bytearray(64 << 20)
+        for i in range(0, len(large), 4096):
+            large[i] = 1
+        self.assertLess(peak_memory(chess, 'ALPHABETA', 2), len(large) // 4)
+        del large
+
+    def test_generated_board(self):
+        self.assertEqual(generated_board(7).initial_map, generated_board(7).initial_map)
+        self.assertNotEqual(generated_board(7).initial_map, generated_board(8).initial_map)
+
+    def test_compare(self):
+        runs = run_benchmark(benchmark_positions(['../res/input1.txt'], generated=1), depths=[2], repeat=1)
+        self.assertEqual(4, len(runs))
+        self.assertEqual(['MINIMAX', 'ALPHABETA', 'MINIMAX', 'ALPHABETA'], [run['algorithm'] for run in runs])
+        self.assertEqual('F4-H2', runs[0]['move'])
+        self.assertTrue(all(run['peak_memory'] >= 0 for run in runs))
+        self.assertEqual([], compare(runs, runs))
+        baseline = [dict(run) for run in runs]
+        baseline[0]['move'] = 'F4-G3'
+        baseline[3]['visited'] = runs[3]['visited'] // 2
+        regressions = compare(runs, baseline)
+        self.assertEqual([('../res/input1.txt', 'MINIMAX'), ('generated561', 'ALPHABETA')], [(r['position'], r['algorithm']) for r in regressions])
@@ -1,6 +1,7 @@
+import copy
 from unittest import TestCase, skip
 
-from hw1cs561s2018 import Chess, Configuration, alphabeta_cutoff_search, minimax_decision
+from hw1cs561s2018 import C_JUMPS, C_STEPS, Chess, Configuration, Piece, S_STEPS, alphabeta_cutoff_search, minimax_decision
 
 
 class TestChess(TestCase):
@@ -564,3 +565,123 @@ S1,0,S1,0,S1,0,S1,0
         result = chess.translate(minimax_decision(game=chess, state=chess.initial_state, depth_limit=chess.config.depth_limit))
         self.assertEqual("F4-H2\n160\n160\n5\n", result)
         chess.write_to_file(result)
+
+    def test_bitboard_moves(self):
+        configuration1 = Configuration(path=None)
+        configuration1.generate_configuration_from_string(
+            """Star
+ALPHABETA
+2
+0,S2,0,0,0,0,0,0
+S1,0,0,0,0,0,0,0
+0,C1,0,0,0,0,0,C1
+0,0,S1,0,0,0,S1,0
+0,0,0,0,0,0,0,0
+0,0,0,0,0,0,0,0
+0,0,0,0,0,0,0,0
+0,0,0,0,0,0,0,0
+10,20,30,40,50,60,70,80
+        """)
+        chess1 = Chess(path=None, configuration=configuration1)
+        state = chess1.initial_state
+        self.assertEqual(2, state.s_pieces.count(Piece('S', (0, 1))))
+        self.assertEqual([((1, 0), (0, 1)), ((3, 2), (2, 3)), ((3, 6), (2, 5))], chess1.actions(state))
+        self.assertEqual([((2, 1), (3, 0)), ((2, 1), (4, 3)), ((2, 7), (4, 5))], state.moves('C'))
+
+        state = chess1.result(state, ((1, 0), (0, 1)))
+        self.assertEqual(3, state.s_pieces.count(Piece('S', (0, 1))))
+        self.assertEqual(Chess.evaluation(state.s_pieces, state.c_pieces, 'S', configuration1.row_values), state.utility)
+        state = chess1.result(state, ((2, 7), (4, 5)))
+        self.assertEqual([Piece('S', (0, 1))] * 3 + [Piece('S', (3, 2))], state.s_pieces)
+        self.assertEqual([Piece('C', (2, 1)), Piece('C', (4, 5))], state.c_pieces)
+        self.assertEqual(Chess.evaluation(state.s_pieces, state.c_pieces, 'S', configuration1.row_values), state.utility)
+
+    def test_incremental_utility(self):
+        configuration1 = Configuration(path=None)
+        configuration1.generate_configuration_from_string(
+            """Circle
+MINIMAX
+4
+0,S2,0,0,0,0,0,0
+S1,0,C1,0,0,0,0,0
+0,0,0,S1,0,0,0,C1
+0,0,0,0,0,0,S1,0
+0,0,0,0,0,S1,0,0
+0,0,0,0,0,0,0,0
+0,C1,0,0,0,0,0,0
+0,0,C2,0,0,0,0,0
+10,20,30,40,50,60,70,80
+        """)
+        chess1 = Chess(path=None, configuration=configuration1)
+        chess2 = Chess(path=None, configuration=configuration1, verify=True)
+        utility1 = minimax_decision(chess1.initial_state, chess1, configuration1.depth_limit)
+        self.assertEqual(utility1, minimax_decision(chess2.initial_state, chess2, configuration1.depth_limit))
+
+    def test_move_tables(self):
+        self.assertEqual((), S_STEPS[0])
+        self.assertEqual(((1 << 1, ((1, 0), (0, 1))),), S_STEPS[8])
+        self.assertEqual(((1 << 26, 1 << 35, ((2, 1), (4, 3))),), C_JUMPS[17])
+        self.assertEqual([((2, 6), (4, 4))], [action for over, target, action in C_JUMPS[22]])
+        self.assertEqual([((7, 7), (6, 6))], [action for target, action in S_STEPS[63]])
+        self.assertEqual((), C_STEPS[60] + C_JUMPS[60])
+
+    def test_apply_undo(self):
+        configuration1 = Configuration(path=None)
+        configuration1.generate_configuration_from_string(
+            """Star
+MINIMAX
+4
+0,S2,0,0,0,0,0,0
+S1,0,C1,0,0,0,0,0
+0,0,0,S1,0,0,0,C1
+0,0,0,0,0,0,S1,0
+0,0,0,0,0,S1,0,0
+0,0,0,0,0,0,0,0
+0,C1,0,0,0,0,0,0
+0,0,C2,0,0,0,0,0
+10,20,30,40,50,60,70,80
+        """)
+        chess1 = Chess(path=None, configuration=configuration1, verify=True)
+        state = chess1.initial_state
+        fields = lambda s: (s.to_move, s.utility, s.s_squares, s.c_squares, s.s_board, s.c_board, s.stacks, s.s_no_move, s.c_no_move, s.key)
+        before = copy.deepcopy(fields(state))
+        for a in chess1.actions(state):
+            child = chess1.result(state, a)
+            self.assertEqual(before, fields(state))
+            token = chess1.apply(state, a)
+            self.assertEqual(fields(child), fields(state))
+            for b in chess1.actions(state):
+                grandchild = chess1.result(state, b)
+                token2 = chess1.apply(state, b)
+                self.assertEqual(fields(grandchild), fields(state))
+                chess1.undo(state, token2)
+            self.assertEqual(fields(child), fields(state))
+            chess1.undo(state, token)
+            self.assertEqual(before, fields(state))
+
+    def test_generate_moves(self):
+        configuration1 = Configuration(path=None)
+        configuration1.generate_configuration_from_string(
+            """Star
+ALPHABETA
+6
+0,S2,0,0,0,0,0,0
+S1,0,C1,0,0,0,0,0
+0,0,0,S1,0,0,0,C1
+0,0,0,0,0,0,S1,0
+0,0,0,0,0,S2,0,0
+0,0,0,0,0,0,0,0
+0,C1,0,0,0,0,0,0
+0,0,C2,0,0,0,0,0
+10,20,30,40,50,60,70,80
+        """)
+        chess1 = Chess(path=None, configuration=configuration1)
+        state = chess1.initial_state
+        for player in ('S', 'C'):
+            moves = list(state.generate_moves(player))
+            self.assertEqual(sorted(state.moves(player)), sorted(moves))
+            jumps = [abs(a[0][0] - a[1][0]) == 2 for a in moves]
+            self.assertEqual(sorted(jumps, reverse=True), jumps)
+        self.assertEqual(2, list(state.generate_moves('S')).count(((4, 5), (3, 4))))
+        self.assertEqual(list(chess1.lazy_actions(state)), list(state.generate_moves('S')))
+        self.assertEqual(alphabeta_cutoff_search(state, chess1, d=6)[:3], alphabeta_cutoff_search(state, chess1, d=6, lazy=True)[:3])
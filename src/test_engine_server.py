@@ -0,0 +1,107 @@
+import json
+import os
+import shutil
+import socket
+import tempfile
+import threading
+from unittest import TestCase
+
+from engine_server import EngineServer, SocketServer, serve_lines
+
+DENSE = """Star
+ALPHABETA
+6
+0,C1,0,C1,0,C1,0,C1
+C1,0,C1,0,C1,0,C1,0
+0,C1,0,C1,0,C1,0,C1
+0,0,0,0,0,0,0,0
+0,0,0,0,0,0,0,0
+S1,0,S1,0,S1,0,S1,0
+0,S1,0,S1,0,S1,0,S1
+S1,0,S1,0,S1,0,S1,0
+10,20,30,40,50,60,70,80"""
+
+
+def request(id, position, **fields):
+    fields.update(id=id, position=position)
+    return json.dumps(fields)
+
+
+def read_position(i):
+    with open('../res/input{}.txt'.format(i)) as f:
+        return f.read()
+
+
+def expected_output(i):
+    with open('../res/output{}.txt'.format(i)) as f:
+        return f.read().strip()
+
+
+class TestEngineServer(TestCase):
+    def setUp(self):
+        self.engine = EngineServer(processes=1)
+
+    def tearDown(self):
+        self.engine.close()
+
+    def serve(self, lines):
+        answers = []
+        serve_lines(self.engine, lines, answers.append)
+        return dict((response['id'], response) for response in map(json.loads, answers))
+
+    def test_serve_lines(self):
+        responses = self.serve([request(i, read_position(i)) for i in range(1, 6)] + ['', 'not json', request(6, DENSE, deadline=0)])
+        for i in range(1, 6):
+            self.assertEqual(expected_output(i), responses[i]['output'].strip())
+        self.assertIn('ValueError', responses[None]['error'])
+        self.assertIn('SearchTimeout', responses[6]['error'])
+
+    def test_warm_table(self):
+        # the second search of the same position is answered from the table the first one filled
+        responses = self.serve([request(1, DENSE)])
+        warm = self.serve([request(2, DENSE)])
+        self.assertLess(warm[2]['nodes'], responses[1]['nodes'])
+        self.assertEqual([responses[1][field] for field in ('move', 'myopic', 'farsighted')], [warm[2][field] for field in ('move', 'myopic', 'farsighted')])
+
+    def test_deadline(self):
+        responses = self.serve([request(1, DENSE, deadline=60)])
+        self.assertEqual(6, responses[1]['depth'])
+        self.assertEqual(self.serve([request(2, DENSE.replace('Star', 'Circle'))])[2]['move'], self.serve([request(3, DENSE.replace('Star', 'Circle'), deadline=60)])[3]['move'])
+
+    def test_deadline_every_algorithm(self):
+        # engines without iterative deepening answer with an error instead of running past the deadline
+        for algorithm in ('MINIMAX', 'PVS', 'MTDF'):
+            position = DENSE.replace('ALPHABETA', algorithm).replace('\n6\n', '\n9\n')
+            response = self.serve([request(1, position, deadline=0.05)])[1]
+            self.assertIn('SearchTimeout', response['error'])
+            self.assertLess(response['time'], 1)
+
+    def test_reject(self):
+        self.engine.close()
+        self.engine = EngineServer(processes=1, max_pending=1, reject=True)
+        responses = self.serve([request(1, DENSE), request(2, DENSE)])
+        self.assertEqual('busy: 1 requests pending', responses[2]['error'])
+        self.assertIn('move', responses[1])
+
+    def test_socket(self):
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, 'engine.sock')
+        server = SocketServer(path, self.engine)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            client.connect(path)
+            client.sendall(('\n'.join(request(i, read_position(i)) for i in (2, 4)) + '\n').encode('utf-8'))
+            client.shutdown(socket.SHUT_WR)
+            f = client.makefile('rb')
+            responses = dict((response['id'], response) for response in (json.loads(line.decode('utf-8')) for line in f))
+            f.close()
+            client.close()
+            self.assertEqual(expected_output(2), responses[2]['output'].strip())
+            self.assertEqual(expected_output(4), responses[4]['output'].strip())
+        finally:
+            server.shutdown()
+            server.server_close()
+            thread.join()
+            shutil.rmtree(directory)
@@ -0,0 +1,110 @@
+from unittest import TestCase
+
+from hw1cs561s2018 import Chess, Configuration, EXACT, LOWER, NOOP, SearchStats, alphabeta_cutoff_search, mcts_search, minimax_decision
+from parallel_search import PublishedNodes, SharedTranspositionTable, lazy_smp_search, root_parallel_mcts, root_parallel_search
+
+
+class TestParallelSearch(TestCase):
+    def test_minimax(self):
+        configuration1 = Configuration(path=None)
+        configuration1.generate_configuration_from_string(
+            """Star
+MINIMAX
+4
+0,0,0,0,0,0,0,0
+0,0,C1,0,0,0,C1,0
+0,0,0,0,0,0,0,0
+0,0,C1,0,C1,0,0,0
+0,S1,0,0,0,S1,0,0
+0,0,S1,0,0,0,0,0
+0,0,0,0,0,0,S1,0
+0,0,0,0,0,0,0,0
+10,20,30,40,50,60,70,80
+            """)
+        chess1 = Chess(path=None, configuration=configuration1)
+        utility1 = minimax_decision(chess1.initial_state, chess1, configuration1.depth_limit)
+        utility2 = root_parallel_search(chess1.initial_state, chess1, configuration1.depth_limit, algorithm='MINIMAX', processes=2)
+        self.assertEqual(utility1, utility2)
+
+    def test_alphabeta(self):
+        chess1 = Chess(path="../res/input3.txt", configuration=None)
+        utility1 = alphabeta_cutoff_search(chess1.initial_state, chess1, chess1.config.depth_limit)
+        utility2 = root_parallel_search(chess1.initial_state, chess1, chess1.config.depth_limit, processes=2)
+        self.assertEqual(utility1[:3], utility2[:3])
+
+    def test_tie_break(self):
+        configuration1 = Configuration(path=None)
+        configuration1.generate_configuration_from_string(
+            """Star
+ALPHABETA
+7
+0,0,0,0,0,0,0,0
+0,S1,0,0,0,S1,0,0
+0,0,0,0,0,0,0,0
+0,0,0,0,0,0,0,0
+0,0,0,0,0,0,0,0
+0,0,0,0,0,0,0,0
+0,0,0,0,0,0,0,0
+0,0,0,0,0,0,0,C1
+10,20,30,40,52,70,90,1000
+            """)
+        chess1 = Chess(path=None, configuration=configuration1)
+        utility1 = root_parallel_search(chess1.initial_state, chess1, configuration1.depth_limit, processes=2)
+        self.assertEqual(((1, 1), (0, 0)), utility1[0])
+        self.assertEqual(1000 + 90 - 1000, utility1[1])
+        self.assertEqual(1000, utility1[2])
+
+    def test_pass(self):
+        chess1 = Chess(path="../res/input4.txt", configuration=None)
+        utility1 = root_parallel_search(chess1.initial_state, chess1, chess1.config.depth_limit, processes=2)
+        self.assertEqual(('Noop', -290, -300, 5), utility1)
+
+    def test_shared_transposition_table(self):
+        table = SharedTranspositionTable(size=4)
+        table.store(1, 3, -10, EXACT, ((6, 1), (4, 3)))
+        table.store(2, 1, 20, LOWER, NOOP)
+        self.assertEqual((1, 3, -10, EXACT, ((6, 1), (4, 3)), 0), table.probe(1))
+        self.assertEqual((2, 1, 20, LOWER, NOOP, 0), table.probe(2))
+        table.store(5, 2, 30, LOWER, None)
+        self.assertEqual(3, table.probe(1)[1])
+        self.assertIsNone(table.probe(5))
+        copy = SharedTranspositionTable(size=4, words=table.words)
+        self.assertEqual(20, copy.probe(2)[2])
+
+    def test_lazy_smp(self):
+        chess1 = Chess(path="../res/input3.txt", configuration=None)
+        utility1 = alphabeta_cutoff_search(chess1.initial_state, chess1, chess1.config.depth_limit)
+        utility2, report = lazy_smp_search(chess1.initial_state, chess1, chess1.config.depth_limit, processes=2, measure_speedup=True)
+        self.assertEqual(utility1[:3], utility2[:3])
+        # every worker reports its nodes, the one stopped part way too, and only the first to finish its time
+        self.assertEqual(2, len(report['worker_nodes']))
+        self.assertGreater(report['worker_nodes'][report['worker']], 0)
+        self.assertEqual(1, report['worker_times'].count(None))
+        self.assertLessEqual(report['worker_times'][report['worker']], report['time'])
+        self.assertGreater(report['speedup'], 0)
+
+    def test_lazy_smp_error(self):
+        # workers that fail are reported instead of leaving the search waiting
+        chess1 = Chess(path="../res/input3.txt", configuration=None)
+        self.assertRaises(RuntimeError, lazy_smp_search, chess1.initial_state, None, 4, processes=2)
+
+    def test_published_nodes(self):
+        counts = [0, 0]
+        nodes = PublishedNodes(counts, 1)
+        stats = SearchStats()
+        stats.depth_nodes = nodes
+        chess1 = Chess(path="../res/input3.txt", configuration=None)
+        alphabeta_cutoff_search(chess1.initial_state, chess1, 4, stats=stats)
+        self.assertEqual([0, stats.visited()], counts)
+
+    def test_root_parallel_mcts(self):
+        chess1 = Chess(path="../res/input3.txt", configuration=None)
+        # a single process grows the same tree as the sequential search
+        self.assertEqual(mcts_search(chess1.initial_state, chess1, iterations=300, seed=3),
+                         root_parallel_mcts(chess1.initial_state, chess1, iterations=300, seed=3, processes=1))
+        stats = SearchStats()
+        utility1 = root_parallel_mcts(chess1.initial_state, chess1, iterations=301, processes=2, stats=stats)
+        self.assertEqual(301, stats.leaf_evaluations)
+        self.assertEqual(utility1[3], stats.visited())
+        self.assertEqual(alphabeta_cutoff_search(chess1.initial_state, chess1, 9)[:2], utility1[:2])
+        self.assertIn(root_parallel_mcts(chess1.initial_state, chess1, iterations=None, time_limit=0.05, processes=2)[0], chess1.actions(chess1.initial_state))
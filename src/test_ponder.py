@@ -0,0 +1,56 @@
+from unittest import TestCase
+
+from hw1cs561s2018 import Chess, Configuration, alphabeta_cutoff_search
+from ponder import PonderingPlayer, search_and_predict
+
+
+class TestPonder(TestCase):
+    def setUp(self):
+        configuration1 = Configuration(path=None)
+        configuration1.generate_configuration_from_string(
+            """Star
+ALPHABETA
+4
+0,C1,0,C1,0,C1,0,C1
+C1,0,C1,0,C1,0,C1,0
+0,0,0,C1,0,0,0,C1
+0,0,0,0,0,0,0,0
+0,0,0,0,0,0,0,0
+S1,0,S1,0,0,0,S1,0
+0,S1,0,S1,0,S1,0,S1
+S1,0,S1,0,S1,0,0,0
+10,20,30,40,50,60,70,80
+            """)
+        self.chess = Chess(path=None, configuration=configuration1)
+        self.chess.display = lambda state: None
+
+    def play(self, ponder):
+        moves = []
+        players = [PonderingPlayer(self.chess, 4, ponder), PonderingPlayer(self.chess.viewed_by('C'), 4, ponder)]
+
+        def recorded(player):
+            return lambda game, state: moves.append(player(game, state)) or moves[-1]
+
+        value = self.chess.play_game(*map(recorded, players))
+        return value, moves, players
+
+    def test_view(self):
+        circle = self.chess.viewed_by('C')
+        state = self.chess.result(self.chess.initial_state, self.chess.actions(self.chess.initial_state)[0])
+        viewed = circle.view(state, self.chess)
+        self.assertEqual(-state.utility, viewed.utility)
+        self.assertEqual(state.key, viewed.key)
+        self.assertEqual(alphabeta_cutoff_search(viewed, circle, d=3)[:3], search_and_predict(viewed, circle, 3)[0][:3])
+
+    def test_play_game(self):
+        # pondering only changes when the searches run, never the moves
+        value, moves, players = self.play(False)
+        ponder_value, ponder_moves, ponder_players = self.play(True)
+        self.assertEqual((value, moves), (ponder_value, ponder_moves))
+        for player, ponder_player in zip(players, ponder_players):
+            report = ponder_player.report()
+            self.assertEqual(player.report()['moves'], report['moves'])
+            self.assertEqual(0, player.report()['ponder_hits'])
+            self.assertGreater(report['ponder_hits'], 0)
+            self.assertLessEqual(report['ponder_hits'] + report['ponder_misses'], report['moves'])
+            self.assertIsNone(ponder_player.pondering)
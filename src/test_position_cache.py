@@ -0,0 +1,64 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+from unittest import TestCase
+
+from hw1cs561s2018 import Chess, Configuration, SearchStats, alphabeta_cutoff_search
+from position_cache import PositionCache
+
+
+class TestPositionCache(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'cache.sqlite')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def search(self, chess, d, cache):
+        stats = SearchStats()
+        result = alphabeta_cutoff_search(chess.initial_state, chess, d, table=cache, stats=stats)
+        cache.close()
+        return result, stats
+
+    def test_cache_across_runs(self):
+        chess1 = Chess(path="../res/input4.txt", configuration=None)
+        utility1 = alphabeta_cutoff_search(chess1.initial_state, chess1, 6)
+        utility2, stats2 = self.search(chess1, 6, PositionCache(self.path, chess1.config.player, chess1.config.row_values))
+        self.assertEqual(utility1[:3], utility2[:3])
+        # the same root again is answered from the file
+        utility3, stats3 = self.search(chess1, 6, PositionCache(self.path, chess1.config.player, chess1.config.row_values))
+        self.assertEqual(utility1[:3], utility3[:3])
+        self.assertEqual(1, stats3.visited())
+        # a deeper search reuses the interior entries
+        utility4, stats4 = self.search(chess1, 7, PositionCache(self.path, chess1.config.player, chess1.config.row_values))
+        utility5, stats5 = self.search(chess1, 7, PositionCache(os.path.join(self.directory, 'other.sqlite'), chess1.config.player, chess1.config.row_values))
+        self.assertEqual(utility5[:3], utility4[:3])
+        self.assertGreater(stats4.table_hits, 0)
+        # other row values are another context
+        utility6, stats6 = self.search(chess1, 6, PositionCache(self.path, chess1.config.player, [1] + chess1.config.row_values[1:]))
+        self.assertEqual(0, stats6.table_hits)
+
+    def test_eviction(self):
+        chess1 = Chess(path="../res/input4.txt", configuration=None)
+        self.search(chess1, 6, PositionCache(self.path, chess1.config.player, chess1.config.row_values, max_entries=10))
+        connection = sqlite3.connect(self.path)
+        self.assertEqual(10, connection.execute('SELECT COUNT(*) FROM positions').fetchone()[0])
+        connection.close()
+
+    def test_mirror(self):
+        # an input that mirrors an earlier one finds its positions in the file
+        chess1 = Chess(path="../res/input4.txt", configuration=None)
+        configuration2 = Configuration(path="../res/input4.txt")
+        configuration2.initial_map = [row[::-1] for row in configuration2.initial_map]
+        chess2 = Chess(path=None, configuration=configuration2)
+        self.assertEqual(chess1.initial_state.canonical_key(), chess2.initial_state.canonical_key())
+        self.assertNotEqual(chess1.initial_state.key, chess2.initial_state.key)
+        self.search(chess1, 6, PositionCache(self.path, chess1.config.player, chess1.config.row_values))
+        utility1 = alphabeta_cutoff_search(chess2.initial_state, chess2, 6)
+        utility2, stats2 = self.search(chess2, 6, PositionCache(self.path, chess2.config.player, chess2.config.row_values))
+        utility3, stats3 = self.search(chess2, 6, PositionCache(os.path.join(self.directory, 'other.sqlite'), chess2.config.player, chess2.config.row_values))
+        self.assertEqual(utility1[:3], utility2[:3])
+        self.assertEqual(utility1[:3], utility3[:3])
+        self.assertLess(stats2.visited(), stats3.visited())
@@ -0,0 +1,95 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from hw1cs561s2018 import Chess, Configuration, SearchStats, alphabeta_cutoff_search, minimax_decision
+from tablebase import Tablebase, generate_tablebase
+
+
+def chess_from_string(string):
+    configuration = Configuration(path=None)
+    configuration.generate_configuration_from_string(string)
+    return Chess(path=None, configuration=configuration)
+
+
+class TestTablebase(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp()
+        cls.path = os.path.join(cls.directory, 'tablebase.bin')
+        cls.tablebase = generate_tablebase([10, 20, 30, 40, 50, 60, 70, 80], 2)
+        cls.tablebase.save(cls.path)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.directory)
+
+    def test_probe(self):
+        chess1 = chess_from_string(
+            """Circle
+MINIMAX
+0
+0,S2,0,0,0,0,0,0
+0,0,0,0,0,0,0,0
+0,0,0,0,0,0,0,0
+0,0,C1,0,0,0,0,0
+0,0,0,0,0,S1,0,0
+0,0,0,0,0,0,0,0
+0,0,0,0,0,0,0,0
+0,0,C1,0,0,0,0,0
+10,20,30,40,50,60,70,80
+        """)
+        state = chess1.initial_state
+        exact = minimax_decision(state, chess1)[2]
+        self.assertEqual(exact, self.tablebase.probe(state, 'C'))
+        self.assertEqual(-exact, self.tablebase.probe(state, 'S'))
+        mapped = Tablebase.load(self.path)
+        try:
+            self.assertEqual(exact, mapped.probe(state, 'C'))
+            self.assertEqual(len(self.tablebase.values), len(mapped.values))
+        finally:
+            mapped.close()
+
+        chess2 = Chess(path="../res/input5.txt", configuration=None)
+        self.assertIsNone(self.tablebase.probe(chess2.initial_state, 'S'))
+
+        # the mirror image has its pieces on the light squares and is found through the original
+        mirrored = chess_from_string(
+            """Circle
+MINIMAX
+0
+0,0,0,0,0,0,S2,0
+0,0,0,0,0,0,0,0
+0,0,0,0,0,0,0,0
+0,0,0,0,0,C1,0,0
+0,0,S1,0,0,0,0,0
+0,0,0,0,0,0,0,0
+0,0,0,0,0,0,0,0
+0,0,0,0,0,C1,0,0
+10,20,30,40,50,60,70,80
+        """)
+        self.assertEqual(exact, minimax_decision(mirrored.initial_state, mirrored)[2])
+        self.assertEqual(exact, self.tablebase.probe(mirrored.initial_state, 'C'))
+
+    def test_search(self):
+        chess1 = chess_from_string(
+            """Star
+ALPHABETA
+30
+0,0,0,0,0,0,0,0
+0,0,0,0,0,0,0,0
+0,0,0,0,0,0,0,0
+0,0,C1,0,0,0,0,0
+0,0,0,0,0,0,0,0
+0,0,0,0,S1,0,S1,0
+0,0,0,0,0,0,0,0
+0,0,0,0,0,0,0,0
+10,20,30,40,50,60,70,80
+        """)
+        utility1 = alphabeta_cutoff_search(chess1.initial_state, chess1, 30)
+        stats = SearchStats()
+        utility2 = alphabeta_cutoff_search(chess1.initial_state, chess1, 30, stats=stats, tablebase=self.tablebase)
+        self.assertEqual(utility1[:3], utility2[:3])
+        self.assertGreater(stats.tablebase_hits, 0)
+        self.assertLess(utility2[3], utility1[3])
@@ -0,0 +1,65 @@
+import json
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from tournament import main, parse_engine, play_match, play_tournament, read_results, schedule, summarize
+
+ENGINES = [parse_engine('deep:ALPHABETA:3'), parse_engine('shallow:MINIMAX:1'), parse_engine('flat:PVS:2:10,10,10,10,10,10,10,10')]
+
+
+class TestTournament(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.results = os.path.join(self.directory, 'results.jsonl')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_schedule(self):
+        self.assertEqual({'name': 'flat', 'algorithm': 'PVS', 'depth': 2, 'row_values': [10] * 8}, ENGINES[2])
+        matches = schedule(ENGINES, 2, seed=5)
+        self.assertEqual(12, len(matches))
+        self.assertEqual(12, len(set(match['game'] for match in matches)))
+        self.assertEqual(('5:deep:shallow', 'deep', 'shallow'), (matches[0]['game'], matches[0]['S']['name'], matches[0]['C']['name']))
+
+    def test_play_match(self):
+        # a seeded game is played the same way every time
+        match = schedule(ENGINES, 1)[0]
+        summary = play_match((match, [10, 20, 30, 40, 50, 60, 70, 80], 4))
+        again = play_match((match, [10, 20, 30, 40, 50, 60, 70, 80], 4))
+        self.assertEqual([(move['engine'], move['nodes']) for move in summary['moves']], [(move['engine'], move['nodes']) for move in again['moves']])
+        self.assertEqual(summary['value'], again['value'])
+        self.assertEqual(summary['value'] > 0 and 'S' or summary['value'] < 0 and 'C' or None, summary['winner'])
+        self.assertEqual(set(['deep', 'shallow']), set(move['engine'] for move in summary['moves']))
+
+    def test_resume(self):
+        played = list(play_tournament(ENGINES[:2], self.results, games=2, processes=2))
+        self.assertEqual(4, len(played))
+        # an interrupted run leaves the last line cut short
+        with open(self.results) as f:
+            lines = f.read().splitlines()
+        with open(self.results, 'w') as f:
+            f.write('\n'.join(lines[:3]) + '\n' + lines[3][:20])
+        self.assertEqual(3, len(read_results(self.results)))
+        resumed = list(play_tournament(ENGINES[:2], self.results, games=2, processes=2))
+        self.assertEqual([json.loads(lines[3])['game']], [summary['game'] for summary in resumed])
+        self.assertEqual([], list(play_tournament(ENGINES[:2], self.results, games=2, processes=2)))
+        report = summarize(read_results(self.results))
+        self.assertEqual(4, report['games'])
+        self.assertEqual(0, report['errors'])
+        for engine in report['engines'].values():
+            self.assertEqual(4, engine['games'])
+            self.assertEqual(4, engine['wins'] + engine['losses'] + engine['draws'])
+            self.assertGreater(engine['nodes_per_second'], 0)
+        self.assertEqual(report['engines']['deep']['wins'], report['engines']['shallow']['losses'])
+
+    def test_main(self):
+        output = os.path.join(self.directory, 'report.json')
+        self.assertEqual(0, main(['a:ALPHABETA:2', 'b:MTDF:2', '--results', self.results, '--games', '1', '--processes', '1', '--output', output]))
+        self.assertEqual(2, len(read_results(self.results)))
+        with open(output) as f:
+            report = json.load(f)
+        self.assertEqual(2, report['games'])
+        self.assertGreater(report['games_per_second'], 0)
@@ -0,0 +1,206 @@
+import argparse
+import copy
+import json
+import os
+import random
+import sys
+import time
+from multiprocessing import Pool, cpu_count
+
+from hw1cs561s2018 import Chess, Configuration, SearchStats, solve
+
+# ______________________________________________________________________________
+# Self-play tournament
+# every ordered pair of engines plays one game per seed, so each pairing is played from every opening with both
+# colours. An opening is the usual starting board after a few random moves drawn from the seed. The games run in
+# a pool of workers and every finished game is appended to the results file as one JSON line, a tournament run
+# again with the same results file only plays the games that file does not hold yet.
+OPENING = """Star
+MINIMAX
+0
+0,C1,0,C1,0,C1,0,C1
+C1,0,C1,0,C1,0,C1,0
+0,C1,0,C1,0,C1,0,C1
+0,0,0,0,0,0,0,0
+0,0,0,0,0,0,0,0
+S1,0,S1,0,S1,0,S1,0
+0,S1,0,S1,0,S1,0,S1
+S1,0,S1,0,S1,0,S1,0
+{}"""
+
+
+def parse_engine(spec):
+    # name:ALGORITHM:depth with an optional :row values table the engine evaluates with
+    fields = spec.split(':')
+    if len(fields) not in (3, 4):
+        raise ValueError('an engine is name:ALGORITHM:depth[:row values], not {}'.format(spec))
+    engine = {'name': fields[0], 'algorithm': fields[1].upper(), 'depth': int(fields[2])}
+    if len(fields) == 4:
+        engine['row_values'] = [int(value) for value in fields[3].split(',')]
+    return engine
+
+
+def engine_game(chess, engine, player):
+    configuration = copy.copy(chess.config)
+    configuration.player = player
+    configuration.algorithm = engine['algorithm']
+    configuration.depth_limit = engine['depth']
+    configuration.row_values = engine.get('row_values', chess.config.row_values)
+    return Chess(path=None, configuration=configuration)
+
+
+class EnginePlayer:
+    def __init__(self, game, name, moves):
+        self.game = game
+        self.name = name
+        self.moves = moves
+
+    def __call__(self, game, state):
+        stats = SearchStats()
+        start = time.time()
+        result = solve(self.game, stats=stats, state=self.game.view(state, game))
+        self.moves.append({'engine': self.name, 'time': time.time() - start, 'nodes': stats.visited()})
+        return result[0]
+
+
+def schedule(engines, games, seed=0):
+    return [{'game': '{}:{}:{}'.format(s, first['name'], second['name']), 'seed': s, 'S': first, 'C': second}
+            for s in range(seed, seed + games) for first in engines for second in engines if first is not second]
+
+
+def play_match(task):
+    match, row_values, random_plies = task
+    summary = {'game': match['game'], 'seed': match['seed'], 'S': match['S']['name'], 'C': match['C']['name']}
+    start = time.time()
+    try:
+        configuration = Configuration(path=None)
+        configuration.generate_configuration_from_string(OPENING.format(','.join(str(value) for value in row_values)))
+        chess = Chess(path=None, configuration=configuration)
+        # the final board is already in the results, workers print nothing
+        chess.display = lambda state: None
+        rng = random.Random(match['seed'])
+        state = chess.initial_state
+        for i in range(random_plies):
+            if chess.terminal_test(state):
+                break
+            state = chess.result(state, rng.choice(chess.actions(state)))
+        chess.initial_state = state
+        moves = []
+        players = dict((player, EnginePlayer(engine_game(chess, match[player], player), match[player]['name'], moves)) for player in ('S', 'C'))
+        if chess.terminal_test(state):
+            value = chess.utility(state, 'S')
+        else:
+            value = chess.play_game(players[state.to_move], players[state.to_move == 'S' and 'C' or 'S'])
+    except Exception as e:
+        summary['error'] = '{}: {}'.format(e.__class__.__name__, e)
+        summary['time'] = time.time() - start
+        return summary
+    summary['time'] = time.time() - start
+    summary['value'] = value
+    summary['winner'] = value > 0 and 'S' or value < 0 and 'C' or None
+    summary['moves'] = moves
+    return summary
+
+
+def read_results(path):
+    # the games a results file holds, a line cut short by an interrupted run is dropped and the file rewritten without it
+    results = []
+    if not os.path.exists(path):
+        return results
+    with open(path) as f:
+        lines = f.read().splitlines()
+    for line in lines:
+        try:
+            results.append(json.loads(line))
+        except ValueError:
+            continue
+    if len(results) < len(lines):
+        with open(path, 'w') as f:
+            f.writelines(json.dumps(result, sort_keys=True) + '\n' for result in results)
+    return results
+
+
+def play_tournament(engines, results_path, games=10, row_values=(10, 20, 30, 40, 50, 60, 70, 80), random_plies=4, seed=0, processes=None):
+    # yields the games not yet in the results file in completion order, after appending each of them to it,
+    # games that failed before are played again
+    done = set(result['game'] for result in read_results(results_path) if 'error' not in result)
+    tasks = [(match, list(row_values), random_plies) for match in schedule(engines, games, seed) if match['game'] not in done]
+    if not tasks:
+        return
+    processes = processes or cpu_count()
+    chunksize = max(1, len(tasks) // (4 * processes))
+    pool = Pool(processes)
+    try:
+        with open(results_path, 'a') as f:
+            for summary in pool.imap_unordered(play_match, tasks, chunksize):
+                f.write(json.dumps(summary, sort_keys=True) + '\n')
+                f.flush()
+                yield summary
+    finally:
+        pool.close()
+        pool.join()
+
+
+def summarize(results, elapsed=None, played=None):
+    # win, loss and draw counts, score and search speed per engine, and games per second of the last run,
+    # a game played more than once counts with its last result
+    results = list(dict((result['game'], result) for result in results).values())
+    engines = dict()
+    for result in results:
+        if 'error' in result:
+            continue
+        for player in ('S', 'C'):
+            engine = engines.setdefault(result[player], {'games': 0, 'wins': 0, 'losses': 0, 'draws': 0, 'moves': 0, 'nodes': 0, 'time': 0.0})
+            engine['games'] += 1
+            if result['winner'] is None:
+                engine['draws'] += 1
+            elif result['winner'] == player:
+                engine['wins'] += 1
+            else:
+                engine['losses'] += 1
+        for move in result['moves']:
+            engine = engines[move['engine']]
+            engine['moves'] += 1
+            engine['nodes'] += move['nodes']
+            engine['time'] += move['time']
+    for engine in engines.values():
+        engine['score'] = (engine['wins'] + 0.5 * engine['draws']) / engine['games']
+        engine['nodes_per_second'] = engine['time'] and engine['nodes'] / engine['time'] or 0.0
+    report = {'games': sum(engine['games'] for engine in engines.values()) // 2, 'errors': sum('error' in result for result in results), 'engines': engines}
+    if elapsed is not None and played is not None:
+        report['games_per_second'] = elapsed and played / elapsed or 0.0
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Play engines against each other from seeded openings and report their results.')
+    parser.add_argument('engines', nargs='+', help='engines as name:ALGORITHM:depth, optionally followed by :row values the engine evaluates with')
+    parser.add_argument('--results', required=True, help='JSON lines file of the games, an interrupted tournament resumes from it')
+    parser.add_argument('--games', type=int, default=10, help='seeds played by every ordered pair of engines')
+    parser.add_argument('--seed', type=int, default=0, help='first seed')
+    parser.add_argument('--random-plies', type=int, default=4, help='random moves played from the starting board to open a game')
+    parser.add_argument('--row-values', default='10,20,30,40,50,60,70,80', help='row values the games are scored with')
+    parser.add_argument('--processes', type=int, default=None, help='number of worker processes, one per CPU by default')
+    parser.add_argument('--output', default=None, help='JSON file the report is written to, standard output by default')
+    args = parser.parse_args(argv)
+    engines = [parse_engine(spec) for spec in args.engines]
+    if len(set(engine['name'] for engine in engines)) != len(engines):
+        parser.error('engine names must differ')
+    row_values = [int(value) for value in args.row_values.split(',')]
+    start = time.time()
+    played = 0
+    for summary in play_tournament(engines, args.results, args.games, row_values, args.random_plies, args.seed, args.processes):
+        played += 1
+        if 'error' in summary:
+            sys.stderr.write('{}: {}\n'.format(summary['game'], summary['error']))
+    report = summarize(read_results(args.results), time.time() - start, played)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+    else:
+        sys.stdout.write(json.dumps(report, indent=2, sort_keys=True) + '\n')
+    return report['errors'] and 1 or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())